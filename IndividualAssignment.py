@@ -1,6 +1,7 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+from data_store import data_path, load_csv
+from remote_fetch import fetch, seed
 
 st.set_page_config(
     page_title="Scientific Visualization : Individual Assignment"
@@ -26,8 +27,13 @@ st.set_page_config(page_title="Student Mental Health Dashboard")
 # Load data from GitHub
 url = 'https://raw.githubusercontent.com/s22a0050-ainun/SS2200/main/Student_Mental_Health.csv'
 
+# The bundled copy stands in until the first successful download, so the
+# page still works offline; after that the local mirror is revalidated
+# against GitHub every few minutes instead of downloading on every rerun
+seed(url, data_path("Student_Mental_Health.csv"))
+
 try:
-    df = pd.read_csv(url)
+    df = load_csv(fetch(url))
     st.success("✅ Data loaded successfully from GitHub!")
     st.write("Dataset of Student Mental Health")
     st.dataframe(df.head())
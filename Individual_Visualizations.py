@@ -1,11 +1,15 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+from plotly.colors import qualitative
+
+import charts
+from cube import survey_cube
+from perf import plotly_chart
 
 st.title("Individual Visualizations")
 
-# Load the main DataFrame
-df = pd.read_csv("Exploring Internet Use and Suicidality in Mental Health Populations.csv")
+# Answer counts of the main dataset (columns already renamed, see datasets.py).
+# Charts are drawn from these counts, so no respondent rows reach the browser.
+cube = survey_cube("internet_use")
 
 st.markdown("### 🎯 Objective ")
 st.info("""
@@ -16,22 +20,18 @@ To identify demographic differences in mental health experiences
 # 📉 VISUALIZATION 1: GENDER DISTRIBUTION ACROSS YEAR OF STUDY
 # =================================================================
 
-import streamlit as st
-import plotly.express as px
-
 # Streamlit Title
 st.title("Student Demographic Analysis")
 
-# Creating the Plotly Grouped Bar Chart
-# Note: px.histogram acts as a countplot when only an x-axis is provided
-fig = px.histogram(
-    df, 
+# Creating the Plotly Grouped Bar Chart (one bar per year and gender count)
+fig = charts.bar(
+    cube,
     x='Year_of_Study', 
     color='Gender', 
     barmode='group',
-    color_discrete_sequence=px.colors.qualitative.Set2,
+    colors=qualitative.Set2,
     title='Gender Distribution Across Year of Study',
-    labels={'Year_of_Study': 'Year of Study', 'count': 'Number of Respondents'}
+    labels={'Year_of_Study': 'Year of Study', 'Count': 'Number of Respondents'}
 )
 
 # Optional: Update layout for better aesthetics
@@ -43,54 +43,41 @@ fig.update_layout(
 )
 
 # Render the plot in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # =================================================================
 # 📉 VISUALIZATION 2: YEAR OF STUDY VS CURRENT LIVING SITUATION
 # =================================================================
 
-import streamlit as st
-import plotly.express as px
-import pandas as pd
-
-# 1. Prepare the data (Crosstab)
-year_living_crosstab = pd.crosstab(df['Year_of_Study'], df['Current_Living_Situation'])
-
-# 2. Create the Heatmap using Plotly Express
-fig = px.imshow(
-    year_living_crosstab,
+# 1. Create the Heatmap from the Year of Study x Living Situation counts
+fig = charts.heatmap(
+    cube,
+    'Year_of_Study',
+    'Current_Living_Situation',
     text_auto=True,                # Replaces annot=True (shows numbers)
-    aspect="auto",                 # Adjusts the cell size
-    color_continuous_scale='YlGnBu', # Matches your Seaborn cmap
+    colorscale='YlGnBu',           # Matches your Seaborn cmap
     labels=dict(x="Living Situation", y="Year of Study", color="Count"),
     title='Heatmap: Year of Study vs Current Living Situation'
 )
 
-# 3. Display in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+# 2. Display in Streamlit
+plotly_chart(fig, use_container_width=True)
 
 # =================================================================
 # 📉 VISUALIZATION 3: GENDER VS SOCIAL MEDIA IMPACT ON WELLBEING
 # =================================================================
 
-import streamlit as st
-import plotly.express as px
-import pandas as pd
-
-# 1. Prepare the crosstab data
-gender_impact = pd.crosstab(df['Gender'], df['Social_Media_Positive_Impact_on_Wellbeing'])
-
-# 2. Create the Stacked Bar Chart in Plotly
-# We use .reset_index() because Plotly works best when columns are named
-fig = px.bar(
-    gender_impact, 
+# 1. Create the Stacked Bar Chart from the Gender x Impact counts
+fig = charts.bar(
+    cube,
+    x='Gender',
+    color='Social_Media_Positive_Impact_on_Wellbeing',
     barmode='stack',
-    color_discrete_map={'Positive Impact': 'lightgreen', 'Negative Impact': 'salmon'},
     title='Gender vs. Social Media Impact on Wellbeing',
-    labels={'value': 'Number of Respondents', 'Gender': 'Gender', 'Social_Media_Positive_Impact_on_Wellbeing': 'Impact Type'}
+    labels={'Count': 'Number of Respondents', 'Gender': 'Gender', 'Social_Media_Positive_Impact_on_Wellbeing': 'Impact Type'}
 )
 
-# 3. Refine Layout (Optional)
+# 2. Refine Layout (Optional)
 fig.update_layout(
     xaxis_title="Gender",
     yaxis_title="Number of Respondents",
@@ -98,30 +85,27 @@ fig.update_layout(
     xaxis={'categoryorder':'array', 'categoryarray':['Female', 'Male', 'Other']}
 )
 
-# 4. Display in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+# 3. Display in Streamlit
+plotly_chart(fig, use_container_width=True)
 
 # =================================================================
 # 📉 VISUALIZATION 4: RACE VS SOCIAL MEDIA AS PART OF DAILY ROUTINE
 # =================================================================
 
-import streamlit as st
-import plotly.express as px
-
 # 1. Title for the specific section
 st.subheader("Routine & Demographics")
 
 # 2. Create the Plotly Grouped Bar Chart
-fig = px.histogram(
-    filtered_data, 
+fig = charts.bar(
+    cube,
     x='Social_Media_Daily_Routine', 
     color='Race', 
     barmode='group',
-    color_discrete_sequence=px.colors.qualitative.Set3,
+    colors=qualitative.Set3,
     title='Race vs. Social Media as Part of Daily Routine',
     labels={
         'Social_Media_Daily_Routine': 'Daily Routine Integration', 
-        'count': 'Number of Respondents',
+        'Count': 'Number of Respondents',
         'Race': 'Race/Ethnicity'
     }
 )
@@ -135,29 +119,26 @@ fig.update_layout(
 )
 
 # 4. Display in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # =================================================================
 # 📉 VISUALIZATION 5 : GENDER VS DIFFICULTY SLEEPING DUE TO UNIVERSITY PRESSURE
 # =================================================================
 
-import streamlit as st
-import plotly.express as px
-
 # 1. Section Header
 st.subheader("Health & Wellbeing Analysis")
 
 # 2. Create the Plotly Grouped Bar Chart
-fig = px.histogram(
-    filtered_data, 
+fig = charts.bar(
+    cube,
     x='Difficulty_Sleeping_University_Pressure', 
     color='Gender', 
     barmode='group',
-    color_discrete_sequence=px.colors.qualitative.Set3,
+    colors=qualitative.Set3,
     title='Gender vs. Difficulty Sleeping Due to University Pressure',
     labels={
         'Difficulty_Sleeping_University_Pressure': 'Difficulty Sleeping',
-        'count': 'Number of Respondents',
+        'Count': 'Number of Respondents',
         'Gender': 'Gender'
     }
 )
@@ -172,4 +153,4 @@ fig.update_layout(
 )
 
 # 4. Render in the Streamlit app
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
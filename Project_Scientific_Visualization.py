@@ -1,6 +1,14 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+import charts
+import reactive
+from bitmap_index import survey_index
+from cube import survey_cube
+from datasets import dataset_version, load_dataset
+from figure_cache import cached_figure
+from likert import item_label, likert_summary
+from multi_hot import PLATFORMS, multi_hot_index
+from perf import plotly_chart
 
 # ==================================================
 # PAGE CONFIG
@@ -27,107 +35,319 @@ st.title("Exploring Internet Use and Suicidality in Mental Health Populations")
 # ==================================================
 # DATA LOADING & COLUMN MAPPING
 # ==================================================
-@st.cache_data
-def load_data():
-    df = pd.read_csv(
-        "Exploring Internet Use and Suicidality in Mental Health Populations.csv"
-    )
-
-    column_mapping = {
-        "Gender / Jantina:": "Gender",
-        "Year of Study / Tahun Belajar:": "Year_of_Study",
-        "Race / Bangsa:": "Race",
-        "Employment Status / Status Pekerjaan:": "Employment_Status",
-        "Current living situation / Keadaan hidup sekarang:": "Current_Living_Situation",
-        "Social media has a generally positive impact on my wellbeing. / Media sosial secara amnya mempunyai kesan positif terhadap kesejahteraan saya.":
-            "Social_Media_Positive_Impact_on_Wellbeing",
-        "I have difficulty sleeping due to university-related pressure. / Saya sukar tidur kerana tekanan berkaitan universiti.":
-            "Difficulty_Sleeping_University_Pressure",
-        "Using social media is an important part of my daily routine. / Menggunakan media sosial adalah bahagian penting dalam rutin harian saya.":
-            "Social_Media_Daily_Routine"
-    }
-
-    return df.rename(columns=column_mapping)
-
-df = load_data()
+# Columns are renamed (datasets.INTERNET_USE_COLUMNS) and Year_Num is derived
+# once when the CSV is converted to the columnar cache, not on every rerun
+DATASET = "internet_use"
+df = load_dataset(DATASET)
+
+# Every categorical column encoded once, with its count tables precomputed
+data_version = dataset_version(DATASET)
+cube = survey_cube(DATASET)
+
+# Answer -> bitmap index over the sidebar filter columns
+FILTER_COLUMNS = ("Gender", "Year_of_Study", "Race")
+index = survey_index(DATASET, FILTER_COLUMNS)
+
+# One bit per platform for the "select all" platforms answer
+platforms = multi_hot_index(DATASET, PLATFORMS)
+
 st.success("✅ Data loaded successfully")
 
 # ==================================================
 # TOTAL RESPONDENTS (RAW DATA)
 # ==================================================
-TOTAL_RESPONDENTS = len(df)
+TOTAL_RESPONDENTS = cube.n_rows
 
 # ==================================================
-# DATA TRANSFORMATION
+# DATA FILTERING (USER CONTROLLED)
 # ==================================================
-df["Year_Num"] = df["Year_of_Study"].str.extract(r"(\d)").astype(float)
+# Every chart below is a section (reactive.py) that names the filters and
+# widgets it reads, so a change only reruns and re-sends the sections that
+# read it
+page = reactive.Page("project")
+
+st.sidebar.header("🔍 Data Filtering")
+
+page.filter("Gender", "Gender", cube.labels["Gender"])
+page.filter("Year_of_Study", "Year of Study", cube.labels["Year_of_Study"])
+page.filter("Race", "Race", cube.labels["Race"])
 
 # ==================================================
-# DATA FILTERING (USER CONTROLLED)
+# CHARTS (BUILT SIDE BY SIDE)
 # ==================================================
-st.sidebar.header("🔍 Data Filtering")
+# Each chart's aggregation and figure is a task of the page: a function of
+# the filters (and of its section's own widget) that makes no Streamlit
+# calls. They are all started on the build pool below and the sections take
+# them in page order (task_pool.py), so the charts are built side by side.
+GROUP_OPTIONS = {
+    "Everyone": None,
+    "Gender": "Gender",
+    "Year of Study": "Year_of_Study",
+    "Race": "Race",
+}
 
-gender_filter = st.sidebar.multiselect(
-    "Gender",
-    df["Gender"].dropna().unique(),
-    df["Gender"].dropna().unique()
-)
+PLATFORM_BY = {"Gender": "Gender", "Year of Study": "Year_of_Study"}
 
-year_filter = st.sidebar.multiselect(
-    "Year of Study",
-    df["Year_of_Study"].dropna().unique(),
-    df["Year_of_Study"].dropna().unique()
-)
 
-race_filter = st.sidebar.multiselect(
-    "Race",
-    df["Race"].dropna().unique(),
-    df["Race"].dropna().unique()
-)
+def short_names(likert):
+    return {item: item_label(item)[:60] for item in likert.items}
+
+
+@page.task("gender_by_year")
+def gender_by_year_figure(filters):
+    return cached_figure(data_version, "gender_by_year", filters, lambda: charts.bar(
+        cube,
+        x="Year_of_Study",
+        color="Gender",
+        where=filters,
+        barmode="group",
+        labels={"Year_of_Study":"Year of Study","Count":"Number of Students"}
+    ))
+
+
+@page.task("gender_by_social_media_impact")
+def gender_by_social_media_impact_figure(filters):
+    return cached_figure(data_version, "gender_by_social_media_impact", filters, lambda: charts.bar(
+        cube,
+        x="Gender",
+        color="Social_Media_Positive_Impact_on_Wellbeing",
+        where=filters,
+        barmode="stack",
+        labels={"Social_Media_Positive_Impact_on_Wellbeing":"Perceived Positive Impact","Count":"Number of Students"}
+    ))
+
+
+@page.task("sleep_by_gender")
+def sleep_by_gender_figure(filters):
+    return cached_figure(data_version, "sleep_by_gender", filters, lambda: charts.bar(
+        cube,
+        x="Difficulty_Sleeping_University_Pressure",
+        color="Gender",
+        where=filters,
+        barmode="group",
+        labels={"Difficulty_Sleeping_University_Pressure":"Difficulty Sleeping","Count":"Number of Students"}
+    ))
 
-filtered_data = df[
-    (df["Gender"].isin(gender_filter)) &
-    (df["Year_of_Study"].isin(year_filter)) &
-    (df["Race"].isin(race_filter))
-]
+
+@page.task("year_by_living_situation")
+def year_by_living_situation_figure(filters):
+    return cached_figure(data_version, "year_by_living_situation", filters, lambda: charts.heatmap(
+        cube,
+        "Year_of_Study",
+        "Current_Living_Situation",
+        where=filters,
+        text_auto=True,
+        colorscale="YlGnBu",
+        labels={"x":"Living Situation","y":"Year of Study","color":"Count"}
+    ))
+
+
+@page.task("routine_by_race")
+def routine_by_race_figure(filters):
+    return cached_figure(data_version, "routine_by_race", filters, lambda: charts.bar(
+        cube,
+        x="Social_Media_Daily_Routine",
+        color="Race",
+        where=filters,
+        barmode="group",
+        labels={"Social_Media_Daily_Routine":"Social Media Routine","Count":"Number of Students"}
+    ))
+
+
+@page.task("employment_status")
+def employment_status_figure(filters):
+    return cached_figure(data_version, "employment_status", filters, lambda: charts.pie(
+        cube,
+        names="Employment_Status",
+        where=filters,
+        labels={"Employment_Status":"Employment Status"}
+    ))
+
+
+# Distributions, means, top-box shares and correlations of every 1-5
+# statement for the current filters, computed together and cached; only
+# the means chart depends on the comparison group
+@page.task("likert_shares")
+def likert_shares_figure(filters):
+    likert = likert_summary(DATASET, None, filters)
+    return cached_figure(data_version, "likert_shares", filters, lambda: charts.likert_bars(
+        likert,
+        labels=short_names(likert),
+        title="Ratings per Statement (1 = Strongly Disagree, 5 = Strongly Agree)",
+        colors=["#d7191c", "#fdae61", "#ffffbf", "#a6d96a", "#1a9641"],
+    ))
+
+
+@page.task("likert_means")
+def likert_means_figure(filters, compare_by):
+    group_column = GROUP_OPTIONS[compare_by]
+    likert = likert_summary(DATASET, group_column, filters)
+    names = short_names(likert)
+    return cached_figure(data_version, f"likert_means:{group_column}", filters, lambda: charts.matrix(
+        likert.means.T,
+        x=likert.groups,
+        y=[names[item] for item in likert.items],
+        zmin=1,
+        zmax=5,
+        colorscale="RdYlGn",
+        labels={"x": compare_by, "color": "Mean Rating"},
+        title="Mean Rating by " + compare_by,
+    ))
+
+
+@page.task("likert_correlation")
+def likert_correlation_figure(filters):
+    likert = likert_summary(DATASET, None, filters)
+    names = short_names(likert)
+    figure = cached_figure(data_version, "likert_correlation", filters, lambda: charts.matrix(
+        likert.correlation,
+        x=[f"S{i + 1}" for i in range(len(likert.items))],
+        y=[f"S{i + 1}  {names[item][:40]}" for i, item in enumerate(likert.items)],
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        labels={"color": "Correlation"},
+        title="Correlation Between Statements",
+    ))
+    return figure, likert.table(0)
+
+
+@page.task("platform_prevalence")
+def platform_prevalence_figure(filters):
+    selected_rows = index.select(filters)
+    filtered_total = index.count(filters)
+    return cached_figure(data_version, "platform_prevalence", filters, lambda: charts.table_bar(
+        platforms.prevalence(selected_rows)[:, None],
+        platforms.options,
+        x="Platform",
+        labels={"Count": "Number of Students"},
+        title=f"Platforms Chosen by the {filtered_total} Filtered Respondents",
+    ))
+
+
+@page.task("platforms_by")
+def platforms_by_figure(filters, platform_by):
+    platform_column = PLATFORM_BY[platform_by]
+    return cached_figure(data_version, f"platforms_by:{platform_column}", filters, lambda: charts.table_bar(
+        platforms.by(index, platform_column, filters).T,
+        platforms.options,
+        index.labels[platform_column],
+        x="Platform",
+        color=platform_by,
+        labels={"Count": "Number of Students"},
+        title=f"Platforms by {platform_by}",
+    ))
+
+
+@page.task("platform_co_usage")
+def platform_co_usage_figure(filters):
+    return cached_figure(data_version, "platform_co_usage", filters, lambda: charts.matrix(
+        platforms.co_usage(index.select(filters)),
+        x=platforms.options,
+        y=platforms.options,
+        labels={"color": "Students using both"},
+        title="Platforms Used Together",
+        text_format="d",
+    ))
+
+
+# In page order, so the first charts are ready first; a filter change starts
+# them again for the sections it reruns
+@page.plan
+def chart_tasks():
+    filters = page.filters(FILTER_COLUMNS)
+    return [
+        ("gender_by_year", filters),
+        ("gender_by_social_media_impact", filters),
+        ("sleep_by_gender", filters),
+        ("year_by_living_situation", filters),
+        ("routine_by_race", filters),
+        ("employment_status", filters),
+        ("likert_shares", filters),
+        ("likert_means", filters, page.value("compare_by", "Everyone")),
+        ("likert_correlation", filters),
+        ("platform_prevalence", filters),
+        ("platforms_by", filters, page.value("platforms_by", "Gender")),
+        ("platform_co_usage", filters),
+    ]
+
+
+page.start_tasks()
 
 # ==================================================
 # SUMMARY METRIC BOXES
 # ==================================================
 st.subheader("📊 Summary Metrics")
 
-col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    st.metric("Total Respondents", TOTAL_RESPONDENTS)
+@page.section("metrics", reads=FILTER_COLUMNS)
+def summary_metrics():
+    filters = page.filters(FILTER_COLUMNS)
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Total Respondents", TOTAL_RESPONDENTS)
+
+    with col2:
+        st.metric("Filtered Respondents", index.count(filters))
+
+    with col3:
+        majority_gender = index.mode("Gender", filters)
+        st.metric("Majority Gender", majority_gender)
 
-with col2:
-    st.metric("Filtered Respondents", len(filtered_data))
+    with col4:
+        dominant_year = index.mode("Year_of_Study", filters)
+        st.metric("Dominant Year", dominant_year)
 
-with col3:
-    majority_gender = filtered_data["Gender"].mode(dropna=True)[0] if not filtered_data.empty else "N/A"
-    st.metric("Majority Gender", majority_gender)
 
-with col4:
-    dominant_year = filtered_data["Year_of_Study"].mode(dropna=True)[0] if not filtered_data.empty else "N/A"
-    st.metric("Dominant Year", dominant_year)
+summary_metrics()
 
 # ==================================================
 # VISUALIZATIONS WITH INTERPRETATION
 # ==================================================
+
+
+@page.section("gender_by_year", reads=FILTER_COLUMNS)
+def gender_by_year():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("gender_by_year", filters), use_container_width=True)
+
+
+@page.section("gender_by_social_media_impact", reads=FILTER_COLUMNS)
+def gender_by_social_media_impact():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("gender_by_social_media_impact", filters), use_container_width=True)
+
+
+@page.section("sleep_by_gender", reads=FILTER_COLUMNS)
+def sleep_by_gender():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("sleep_by_gender", filters), use_container_width=True)
+
+
+@page.section("year_by_living_situation", reads=FILTER_COLUMNS)
+def year_by_living_situation():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("year_by_living_situation", filters), use_container_width=True)
+
+
+@page.section("routine_by_race", reads=FILTER_COLUMNS)
+def routine_by_race():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("routine_by_race", filters), use_container_width=True)
+
+
+@page.section("employment_status", reads=FILTER_COLUMNS)
+def employment_status():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("employment_status", filters), use_container_width=True)
+
+
 left, right = st.columns(2)
 
 with left:
     st.subheader("1️⃣ Gender Distribution Across Year of Study")
-
-    fig1 = px.histogram(
-        filtered_data,
-        x="Year_of_Study",
-        color="Gender",
-        barmode="group",
-        labels={"Year_of_Study":"Year of Study","count":"Number of Students"}
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    gender_by_year()
 
     st.markdown("""
     **Interpretation:**  
@@ -135,15 +355,7 @@ with left:
     """)
 
     st.subheader("2️⃣ Gender vs Social Media Impact")
-
-    fig2 = px.histogram(
-        filtered_data,
-        x="Gender",
-        color="Social_Media_Positive_Impact_on_Wellbeing",
-        barmode="stack",
-        labels={"Social_Media_Positive_Impact_on_Wellbeing":"Perceived Positive Impact","count":"Number of Students"}
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    gender_by_social_media_impact()
 
     st.markdown("""
     **Interpretation:**  
@@ -153,15 +365,7 @@ with left:
     """)
 
     st.subheader("3️⃣ Gender vs Difficulty Sleeping")
-
-    fig3 = px.histogram(
-        filtered_data,
-        x="Difficulty_Sleeping_University_Pressure",
-        color="Gender",
-        barmode="group",
-        labels={"Difficulty_Sleeping_University_Pressure":"Difficulty Sleeping","count":"Number of Students"}
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    sleep_by_gender()
 
     st.markdown("""
     **Interpretation:**  
@@ -171,19 +375,7 @@ with left:
 
 with right:
     st.subheader("4️⃣ Year of Study vs Living Situation")
-
-    heatmap_data = pd.crosstab(
-        filtered_data["Year_of_Study"],
-        filtered_data["Current_Living_Situation"]
-    )
-
-    fig4 = px.imshow(
-        heatmap_data,
-        text_auto=True,
-        color_continuous_scale="YlGnBu",
-        labels={"x":"Living Situation","y":"Year of Study","color":"Count"}
-    )
-    st.plotly_chart(fig4, use_container_width=True)
+    year_by_living_situation()
 
     st.markdown("""
     **Interpretation:**  
@@ -192,15 +384,7 @@ with right:
     """)
 
     st.subheader("5️⃣ Race vs Social Media Routine")
-
-    fig5 = px.histogram(
-        filtered_data,
-        x="Social_Media_Daily_Routine",
-        color="Race",
-        barmode="group",
-        labels={"Social_Media_Daily_Routine":"Social Media Routine","count":"Number of Students"}
-    )
-    st.plotly_chart(fig5, use_container_width=True)
+    routine_by_race()
 
     st.markdown("""
     **Interpretation:**  
@@ -209,13 +393,7 @@ with right:
     """)
 
     st.subheader("6️⃣ Employment Status Distribution")
-
-    fig6 = px.pie(
-        filtered_data,
-        names="Employment_Status",
-        labels={"Employment_Status":"Employment Status"}
-    )
-    st.plotly_chart(fig6, use_container_width=True)
+    employment_status()
 
     st.markdown("""
     **Interpretation:**  
@@ -223,6 +401,93 @@ with right:
     showing that academic commitments influence daily routines.
     """)
 
+# ==================================================
+# AGREEMENT STATEMENTS (LIKERT MATRIX)
+# ==================================================
+st.subheader("7️⃣ Agreement Statements")
+
+
+@page.section("likert_shares", reads=FILTER_COLUMNS)
+def likert_shares():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("likert_shares", filters), use_container_width=True)
+
+
+@page.section("likert_means", reads=FILTER_COLUMNS)
+def likert_means():
+    filters = page.filters(FILTER_COLUMNS)
+    compare_by = st.selectbox("Compare by", list(GROUP_OPTIONS), key=page.widget_key("compare_by"))
+    plotly_chart(page.result("likert_means", filters, compare_by), use_container_width=True)
+
+
+@page.section("likert_correlation", reads=FILTER_COLUMNS)
+def likert_correlation():
+    filters = page.filters(FILTER_COLUMNS)
+    figure, table = page.result("likert_correlation", filters)
+    plotly_chart(figure, use_container_width=True)
+
+    with st.expander("Statement summary table"):
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+
+likert_left, likert_right = st.columns(2)
+
+with likert_left:
+    likert_shares()
+
+with likert_right:
+    likert_means()
+
+likert_correlation()
+
+st.markdown("""
+**Interpretation:**  
+Statements about academic stress, anxiety and sleep rise and fall together, and the 
+social media statements form a second cluster. Top-box shares (ratings 4-5) show which 
+experiences are most widely shared among the filtered students.
+""")
+
+# ==================================================
+# PLATFORMS USED (MULTI-SELECT ANSWERS)
+# ==================================================
+st.subheader("8️⃣ Platforms Used Most Often")
+
+
+@page.section("platform_prevalence", reads=FILTER_COLUMNS)
+def platform_prevalence():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("platform_prevalence", filters), use_container_width=True)
+
+
+@page.section("platforms_by", reads=FILTER_COLUMNS)
+def platforms_by():
+    filters = page.filters(FILTER_COLUMNS)
+    platform_by = st.radio("Platforms by", list(PLATFORM_BY), horizontal=True, key=page.widget_key("platforms_by"))
+    plotly_chart(page.result("platforms_by", filters, platform_by), use_container_width=True)
+
+
+@page.section("platform_co_usage", reads=FILTER_COLUMNS)
+def platform_co_usage():
+    filters = page.filters(FILTER_COLUMNS)
+    plotly_chart(page.result("platform_co_usage", filters), use_container_width=True)
+
+
+platform_left, platform_right = st.columns(2)
+
+with platform_left:
+    platform_prevalence()
+
+with platform_right:
+    platforms_by()
+
+platform_co_usage()
+
+st.markdown("""
+**Interpretation:**  
+WhatsApp, TikTok, Instagram and YouTube are used by most students and are usually 
+chosen together, while Facebook, Telegram and Twitter/X are used by smaller groups.
+""")
+
 # ==================================================
 # SUMMARY
 # ==================================================
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from datasets import load_dataset, per_version
+from perf import phase
+from schema import CGPA_BINS
+
+# ==================================================
+# COUNT TABLES FROM THE STUDENT MENTAL HEALTH SURVEY
+# ==================================================
+# Every answer column is turned into integer codes and the whole survey is
+# counted with a single np.bincount over the combined code. Each chart's
+# table is then a sum over that joint array, so reruns never touch the rows.
+
+GENDER = "Choose your gender"
+COURSE = "What is your course?"
+CGPA = "What is your CGPA?"
+DEPRESSION = "Do you have Depression?"
+ANXIETY = "Do you have Anxiety?"
+PANIC = "Do you have Panic attack?"
+
+CONDITIONS = [DEPRESSION, ANXIETY, PANIC]
+GENDER_ORDER = ["Female", "Male"]
+CGPA_ORDER = CGPA_BINS
+YES_NO = ["No", "Yes"]
+
+# Column -> fixed category order (None = categories found in the data, sorted)
+SURVEY_AXES = {
+    GENDER: GENDER_ORDER,
+    COURSE: None,
+    CGPA: CGPA_ORDER,
+    DEPRESSION: YES_NO,
+    ANXIETY: YES_NO,
+    PANIC: YES_NO,
+}
+
+
+def answer_order(values, labels):
+    """``labels`` in the column's own order: its scale when it is an ordered
+    categorical, else sorted."""
+    dtype = getattr(values, "dtype", None)
+    if isinstance(dtype, pd.CategoricalDtype) and dtype.ordered:
+        position = {label: i for i, label in enumerate(dtype.categories)}
+        # Answers outside the scale follow it, sorted (as schema.Category keeps them)
+        return sorted(labels, key=lambda label: (position.get(label, len(position)), label))
+    return sorted(labels)
+
+
+def answers(values):
+    """Column values as they are counted: text trimmed, booleans as "No"/"Yes"."""
+    values = pd.Series(values)
+    if pd.api.types.is_bool_dtype(values):
+        return values.map({False: "No", True: "Yes"})
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values  # already normalised at ingest; keeps an ordered scale
+    if pd.api.types.is_string_dtype(values):
+        return values.str.strip()
+    return values
+
+
+def encode(values, categories=None):
+    """Return (int codes, category labels) for a column; missing values are -1."""
+    values = answers(values)
+    if categories is None:
+        categories = answer_order(values, values.dropna().unique())
+    codes = pd.Categorical(values, categories=categories).codes
+    return np.asarray(codes), list(categories)
+
+
+def count_table(codes, shape):
+    """Count every combination of the given code arrays in one bincount.
+
+    Rows with a missing value in any of the columns are left out.
+    """
+    valid = np.ones(len(codes[0]), dtype=bool)
+    for column_codes in codes:
+        valid &= column_codes >= 0
+    flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+    return np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+
+class CountTables:
+    """Joint answer counts with helpers to slice out the tables pages need."""
+
+    def __init__(self, joint, columns, labels):
+        self.joint = joint
+        self.columns = list(columns)
+        self.labels = dict(zip(columns, labels))
+
+    @phase("aggregate")
+    def counts(self, *columns):
+        """Dense count array over ``columns`` (in that order)."""
+        positions = [self.columns.index(c) for c in columns]
+        others = tuple(i for i in range(len(self.columns)) if i not in positions)
+        table = self.joint.sum(axis=others)
+        kept = sorted(positions)
+        return np.transpose(table, [kept.index(p) for p in positions])
+
+    def total(self):
+        return int(self.joint.sum())
+
+    @phase("aggregate")
+    def long(self, *columns, value_name="Count"):
+        """Long-format DataFrame (one row per category combination) for Plotly."""
+        table = self.counts(*columns)
+        index = pd.MultiIndex.from_product(
+            [self.labels[c] for c in columns], names=list(columns)
+        )
+        return pd.DataFrame({value_name: table.ravel()}, index=index).reset_index()
+
+
+def build_count_tables(df, axes=None):
+    """Encode the answer columns of ``df`` and count them in one pass."""
+    axes = SURVEY_AXES if axes is None else axes
+    encoded = [encode(df[column], categories) for column, categories in axes.items()]
+    shape = tuple(len(labels) for _, labels in encoded)
+    joint = count_table([codes for codes, _ in encoded], shape)
+    return CountTables(joint, list(axes), [labels for _, labels in encoded])
+
+
+@per_version(persist=True)
+def survey_counts(name):
+    """Count tables for dataset ``name``, rebuilt only when its CSV changes.
+
+    Large exports are counted chunk by chunk instead of loaded whole.
+    """
+    from stream_ingest import should_stream, stream_counts  # imports this module
+
+    if should_stream(name):
+        return stream_counts(name, SURVEY_AXES).result()
+    df = load_dataset(name)
+    with phase("index"):
+        return build_count_tables(df)
@@ -1,58 +1,74 @@
 import streamlit as st
 
+import watcher
+from page_loader import lazy_page, navigation, prewarm, preload, run_page, show_page_timings
+
 st.set_page_config(
     page_title="Student Mental Health",
     page_icon=":material/school:",
     layout="wide"
 )
 
-# Define pages
-home = st.Page(
+# Warm pandas / Plotly Express in the background while the first page renders
+preload()
+
+# Rebuild changed survey exports off the request path (watcher.py)
+watcher.start()
+
+# Define pages (each one imports its own dependencies when first opened)
+home = lazy_page(
     "home.py",
     title="Home",
     icon=":material/home:",
     default=True
 )
 
-tutorial3 = st.Page(
+tutorial3 = lazy_page(
     "tutorial3.py",
     title="Pencapaian Akademik Pelajar",
     icon=":material/school:"
 )
 
-individual = st.Page(
+individual = lazy_page(
     "IndividualAssignment.py",
     title="Individual Assignment",
     icon=":material/menu_book:"
 )
 
-gender_mental = st.Page(
+gender_mental = lazy_page(
     "gender_vs_mentalhealth.py",
     title="Gender vs Mental Health",
     icon=":material/favorite:"
 )
 
-panic = st.Page(
+panic = lazy_page(
     "panic_attack.py",
     title="Panic Attack",
     icon=":material/psychology:"
 )
 
-cgpa = st.Page(
+cgpa = lazy_page(
     "gender_vs_cgpa.py",
     title="Gender vs CGPA",
     icon=":material/school:"
 )
 
-project = st.Page(
+project = lazy_page(
     "Project_Scientific_Visualization.py",
     title="Project Scientific Visualization",
     icon=":material/menu_book:"
-)  
+)
 
 # Create navigation menu
-pg = st.navigation({
+pg = navigation({
     "Menu": [home, individual, gender_mental, panic, cgpa, project]
 })
 
-pg.run()
+# Fill the caches with every menu page's default view before the first visitors
+prewarm()
+
+# Run the selected page, timing its imports and its run
+run_page(pg)
+
+# Per-page import and run times (SS2200_PAGE_TIMINGS=1 or ?timings=1)
+show_page_timings()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ==================================================
+# PAGE BENCHMARKS
+# ==================================================
+# Runs every page script headlessly with Streamlit's AppTest against
+# synthetic copies of the survey CSVs (see synthetic.py) and reports the
+# first run, the rerun latency, a filtered rerun, peak memory and the time
+# spent per phase (see perf.py). Each page runs in its own process, with an
+# empty columnar cache, so the first run is a true cold start.
+#
+#   python bench_pages.py
+#   python bench_pages.py --sizes 100 1000000 10000000 --pages panic_attack.py
+#   python bench_pages.py --json before.jsonl            # save results
+#   python bench_pages.py --compare before.jsonl         # exit 1 on regressions
+
+APP_DIR = Path(__file__).resolve().parent
+
+PAGES = (
+    "home.py",
+    "gender_vs_cgpa.py",
+    "panic_attack.py",
+    "gender_vs_mentalhealth.py",
+    "Project_Scientific_Visualization.py",
+    "tutorial3.py",
+)
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+# Seconds AppTest waits for one run (10M-row cold starts take a while)
+RUN_TIMEOUT = 3600
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_page(page, reruns):
+    """Benchmark one page in this process (called in the worker process)."""
+    from streamlit.testing.v1 import AppTest
+
+    import perf
+    from disk_cache import disk_cache
+
+    perf.enable()
+    at = AppTest.from_file(str(APP_DIR / page), default_timeout=RUN_TIMEOUT)
+    result = {"page": page, "start_rss_mb": _peak_rss_mb()}
+
+    result["cold_ms"] = _timed_run(at)
+    result["phases_cold"] = perf.take_timings()
+    result["errors"] = [str(e.value) for e in at.exception]
+    # Hits show what a restart found in the persistent cache (--keep-cache)
+    stats = disk_cache.stats()
+    result["disk_hits"], result["disk_misses"] = stats["hits"], stats["misses"]
+
+    rerun_ms = [_timed_run(at) for _ in range(reruns)]
+    phases = perf.take_timings()
+    result["rerun_ms"] = statistics.median(rerun_ms) if rerun_ms else None
+    result["rerun_min_ms"] = min(rerun_ms) if rerun_ms else None
+    result["phases_rerun"] = {k: v / max(reruns, 1) for k, v in phases.items()}
+
+    # A filter change: keep only the first answer of the first multiselect
+    result["filter_ms"] = None
+    if len(at.multiselect) and at.multiselect[0].options:
+        widget = at.multiselect[0]
+        widget.set_value(widget.options[:1])
+        result["filter_ms"] = _timed_run(at)
+        result["phases_filter"] = perf.take_timings()
+        result["errors"] += [str(e.value) for e in at.exception]
+
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def prepare_data(rows, work_dir):
+    """Folder holding synthetic copies of every survey CSV at ``rows`` rows."""
+    import synthetic
+
+    data_dir = Path(work_dir) / f"rows-{rows}"
+    synthetic.write_all(rows, data_dir)
+    return data_dir
+
+
+def bench(page, rows, data_dir, reruns, keep_cache=False):
+    """Run ``page`` in a fresh process against the CSVs in ``data_dir``."""
+    cache_dir, mirror_dir = data_dir / ".cache", data_dir / ".mirror"
+    if not keep_cache:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        shutil.rmtree(mirror_dir, ignore_errors=True)
+    env = dict(
+        os.environ,
+        SS2200_DATA_DIR=str(data_dir),
+        SS2200_CACHE_DIR=str(cache_dir),
+        SS2200_MIRROR_DIR=str(mirror_dir),
+        # Kept with the cache so a cold run really starts without shared copies
+        SS2200_SHARED_DIR=str(cache_dir / "shared"),
+        SS2200_OFFLINE="1",
+    )
+    command = [sys.executable, str(Path(__file__).resolve()), "--worker", page, "--reruns", str(reruns)]
+    done = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True)
+    if done.returncode != 0:
+        return {"page": page, "rows": rows, "errors": done.stderr.strip().splitlines()[-1:]}
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    result["rows"] = rows
+    return result
+
+
+def _fmt(ms):
+    return "-" if ms is None else f"{ms:,.0f}"
+
+
+def _fmt_phases(phases):
+    return "  ".join(f"{name} {ms:,.0f}" for name, ms in sorted((phases or {}).items(), key=lambda p: -p[1]))
+
+
+def print_row(result):
+    print(
+        f"{result['page']:<38} {result['rows']:>11,} "
+        f"{_fmt(result.get('cold_ms')):>9} {_fmt(result.get('rerun_ms')):>9} "
+        f"{_fmt(result.get('filter_ms')):>9} {_fmt(result.get('peak_rss_mb')):>8}  "
+        f"{_fmt_phases(result.get('phases_cold'))}"
+    )
+    for error in result.get("errors") or []:
+        print(f"{'':<38} ! {error}")
+
+
+def compare(results, baseline_file, threshold):
+    """One line per metric that got slower than ``threshold`` times its baseline."""
+    baseline = {}
+    with open(baseline_file, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                baseline[(record["page"], record["rows"])] = record
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result["page"], result["rows"]))
+        if before is None:
+            continue
+        for metric in ("cold_ms", "rerun_ms", "filter_ms"):
+            old, new = before.get(metric), result.get(metric)
+            if old and new and new > old * threshold:
+                regressions.append(
+                    f"{result['page']} @ {result['rows']:,} rows: {metric} {old:,.0f} -> {new:,.0f} ms"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page render latency across dataset sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="synthetic row counts (100 up to 10000000)")
+    parser.add_argument("--pages", nargs="+", default=list(PAGES))
+    parser.add_argument("--reruns", type=int, default=5, help="warm reruns per page")
+    parser.add_argument("--work-dir", default=Path(tempfile.gettempdir()) / "ss2200-bench",
+                        help="where the synthetic CSVs are kept between runs")
+    parser.add_argument("--keep-cache", action="store_true",
+                        help="reuse the columnar and aggregate caches instead of starting cold")
+    parser.add_argument("--json", help="append the results to this JSON lines file")
+    parser.add_argument("--compare", help="JSON lines file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown factor reported as a regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_page(args.worker, args.reruns)))
+        return 0
+
+    print(f"{'page':<38} {'rows':>11} {'first ms':>9} {'rerun ms':>9} "
+          f"{'filter ms':>9} {'peak MB':>8}  first-run phases (ms)")
+    results = []
+    for rows in args.sizes:
+        data_dir = prepare_data(rows, args.work_dir)
+        for page in args.pages:
+            result = bench(page, rows, data_dir, args.reruns, args.keep_cache)
+            print_row(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as handle:
+            for result in results:
+                handle.write(json.dumps(result) + "\n")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import copy
+
+import numpy as np
+
+from cube import survey_cube
+from datasets import per_version, rows_since, share_arrays
+from perf import phase
+
+# ==================================================
+# BITMAP INDEX FOR SIDEBAR FILTERS
+# ==================================================
+# One packed bit array per (column, answer): bit i is set when respondent i
+# gave that answer. A filter combination is an OR of the chosen answers per
+# column and an AND across columns; counts are popcounts of the result, so
+# no boolean Series or filtered frame is ever built. Rows appended to the
+# survey only set their own bits (appended()).
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits):
+    """Number of set bits in a packed uint8 array."""
+    if hasattr(np, "bitwise_count") and bits.size % 8 == 0:
+        # BitmapIndex pads its bitmaps to whole 64-bit words for this
+        return int(np.bitwise_count(bits.view(np.uint64)).sum())
+    return int(_POPCOUNT[bits].sum())
+
+
+class BitmapIndex:
+    """Per-column answer -> packed bitmap index over the survey rows."""
+
+    def __init__(self, codes, labels, n_rows):
+        self.n_rows = n_rows
+        self.labels = dict(labels)
+        self._n_bytes = -(-n_rows // 64) * 8
+        self.bitmaps = {}
+        for column, column_codes in codes.items():
+            self.bitmaps[column] = [
+                self._pack(column_codes == value)
+                for value in range(len(self.labels[column]))
+            ]
+        self._all = self._pack(np.ones(n_rows, dtype=bool))
+
+    @classmethod
+    def from_cube(cls, cube, columns):
+        return cls(
+            {c: cube.codes[c] for c in columns},
+            {c: cube.labels[c] for c in columns},
+            cube.n_rows,
+        )
+
+    def shared(self, name, kind):
+        """This index with its bitmaps mapped from the shared store (shared_store.py)."""
+        arrays = [bits for column in self.labels for bits in self.bitmaps[column]] + [self._all]
+        arrays = iter(share_arrays(name, kind, arrays))
+        self.bitmaps = {
+            column: [next(arrays) for _ in self.bitmaps[column]] for column in self.labels
+        }
+        self._all = next(arrays)
+        return self
+
+    def _pack(self, mask):
+        bits = np.zeros(self._n_bytes, dtype=np.uint8)
+        packed = np.packbits(mask)
+        bits[: len(packed)] = packed
+        return bits
+
+    def _grown(self, bits, n_bytes):
+        if len(bits) == n_bytes:
+            return bits.copy()
+        return np.concatenate([bits, np.zeros(n_bytes - len(bits), dtype=np.uint8)])
+
+    @staticmethod
+    def _set(bits, positions):
+        np.bitwise_or.at(bits, positions >> 3, (0x80 >> (positions & 7)).astype(np.uint8))
+
+    def appended(self, codes, labels, n_rows):
+        """New index with ``n_rows`` more rows; ``codes`` index into ``labels``.
+
+        Only the bits of the new rows are set. Answers are kept in the order
+        of ``labels`` (the cube's), as a fresh index would have them.
+        """
+        index = copy.copy(self)
+        start = self.n_rows
+        index.n_rows = start + n_rows
+        index._n_bytes = -(-index.n_rows // 64) * 8
+        index.labels, index.bitmaps = {}, {}
+        for column, old_labels in self.labels.items():
+            by_label = {
+                label: self._grown(bits, index._n_bytes)
+                for label, bits in zip(old_labels, self.bitmaps[column])
+            }
+            index.labels[column] = list(labels[column])
+            index.bitmaps[column] = []
+            for value, label in enumerate(index.labels[column]):
+                bits = by_label.get(label)
+                if bits is None:
+                    bits = np.zeros(index._n_bytes, dtype=np.uint8)
+                self._set(bits, start + np.flatnonzero(codes[column] == value))
+                index.bitmaps[column].append(bits)
+        index._all = self._grown(self._all, index._n_bytes)
+        self._set(index._all, np.arange(start, index.n_rows))
+        return index
+
+    @phase("filter")
+    def select(self, where=None):
+        """Packed bitmap of the rows whose answers are in ``where``."""
+        selected = self._all.copy()
+        for column, values in (where or {}).items():
+            wanted = set(values)
+            any_of = np.zeros_like(selected)
+            for value, bits in zip(self.labels[column], self.bitmaps[column]):
+                if value in wanted:
+                    any_of |= bits
+            selected &= any_of
+        return selected
+
+    def count(self, where=None):
+        """Number of rows matching ``where``."""
+        return popcount(self.select(where))
+
+    def value_counts(self, column, where=None):
+        """Count of each answer of ``column`` among the rows matching ``where``."""
+        selected = self.select(where)
+        return np.array([popcount(selected & bits) for bits in self.bitmaps[column]])
+
+    def mode(self, column, where=None, default="N/A"):
+        """Most common answer of ``column`` among the matching rows."""
+        counts = self.value_counts(column, where)
+        if counts.sum() == 0:
+            return default
+        return self.labels[column][int(counts.argmax())]
+
+    def rows(self, where=None):
+        """Row positions matching ``where`` (for when the rows are really needed)."""
+        return np.flatnonzero(np.unpackbits(self.select(where))[: self.n_rows])
+
+
+def _refresh_index(index, since, name, columns):
+    if rows_since(name, since) is None:
+        return None
+    cube = survey_cube(name)
+    with phase("index"):
+        return index.appended(
+            {c: cube.codes[c][index.n_rows:] for c in columns},
+            {c: cube.labels[c] for c in columns},
+            cube.n_rows - index.n_rows,
+        ).shared(name, f"index:{columns}")
+
+
+@per_version(refresh=_refresh_index)
+def survey_index(name, columns):
+    """Bitmap index over ``columns`` of dataset ``name``, rebuilt when its CSV changes."""
+    cube = survey_cube(name)
+    with phase("index"):
+        return BitmapIndex.from_cube(cube, columns).shared(name, f"index:{columns}")
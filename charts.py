@@ -0,0 +1,211 @@
+import numpy as np
+import plotly.colors
+import plotly.graph_objects as go
+
+# ==================================================
+# COUNT CHARTS
+# ==================================================
+# Bar, pie and heatmap figures built straight from a SurveyCube's count
+# tables. The browser gets one value per category (never one per
+# respondent), so the figure JSON stays a few KB however many rows the
+# survey has. Counts are passed to Plotly as NumPy arrays, which Plotly
+# serialises as binary base64 typed arrays instead of lists of numbers.
+#
+# The keyword arguments follow Plotly Express (x, color, barmode, labels,
+# title, ...) so a px chart over row-level data converts one-to-one, and
+# building the traces directly skips Plotly Express's own grouping.
+
+# Color of the n-th answer when a chart is not given its own colors (the
+# default template's colorway, which Plotly would otherwise deal out per trace)
+DEFAULT_COLORS = plotly.colors.qualitative.Plotly
+
+
+def _counts(cube, columns, where):
+    # Smallest integer type that holds the counts keeps the typed arrays short
+    table = cube.counts(*columns, where=where)
+    return table.astype(np.min_scalar_type(int(table.max(initial=0))))
+
+
+def _label(labels, column):
+    return (labels or {}).get(column, column)
+
+
+def bar(cube, x, color=None, *, where=None, barmode="group", labels=None,
+        title=None, colors=None):
+    """Bar chart of respondent counts per ``x`` answer, one trace per ``color`` answer.
+
+    Answers nobody in ``where`` gave are left out, as they would be when
+    counting the filtered rows.
+    """
+    if color is None:
+        return table_bar(_counts(cube, [x], where)[:, None], cube.labels[x], x=x,
+                         barmode=barmode, labels=labels, title=title, colors=colors)
+    return table_bar(_counts(cube, [x, color], where), cube.labels[x], cube.labels[color],
+                     x=x, color=color, barmode=barmode, labels=labels, title=title, colors=colors)
+
+
+def table_bar(table, x_values, names=(None,), *, x="x", color=None, barmode="group",
+              labels=None, title=None, colors=None):
+    """Bar chart of an already counted (``x_values`` x ``names``) table.
+
+    ``x`` and ``color`` name the two axes for the titles and ``labels``;
+    all-zero rows and columns are left out. Each answer in ``names`` keeps
+    its color when others are left out.
+    """
+    colors = colors or DEFAULT_COLORS
+    x_title, y_title = _label(labels, x), _label(labels, "Count")
+    rows = table.sum(axis=1) > 0
+    x_values = [label for label, keep in zip(x_values, rows) if keep]
+    traces = []
+    for j, name in enumerate(names):
+        if not table[:, j].any():
+            continue
+        hover = f"{x_title}=%{{x}}<br>{y_title}=%{{y}}<extra></extra>"
+        if color is not None:
+            hover = f"{_label(labels, color)}={name}<br>" + hover
+        traces.append(go.Bar(
+            x=x_values,
+            y=table[rows, j],
+            name=None if name is None else str(name),
+            offsetgroup=None if name is None else str(name),
+            hovertemplate=hover,
+            marker_color=colors[j % len(colors)],
+        ))
+
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title=title,
+        barmode=barmode,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        legend_title=None if color is None else _label(labels, color),
+        showlegend=color is not None,
+    )
+    return fig
+
+
+def pie(cube, names, *, where=None, labels=None, title=None):
+    """Pie chart of respondent counts per ``names`` answer."""
+    table = _counts(cube, [names], where)
+    keep = table > 0
+    fig = go.Figure(go.Pie(
+        labels=[label for label, k in zip(cube.labels[names], keep) if k],
+        values=table[keep],
+        hovertemplate=f"{_label(labels, names)}=%{{label}}<br>{_label(labels, 'Count')}=%{{value}}<extra></extra>",
+    ))
+    fig.update_layout(title=title, legend_title=_label(labels, names))
+    return fig
+
+
+def heatmap(cube, row, column, *, where=None, labels=None, title=None,
+            colorscale="YlGnBu", text_auto=True):
+    """Heatmap of the ``row`` x ``column`` crosstab (empty rows/columns dropped)."""
+    table = _counts(cube, [row, column], where)
+    rows, columns = table.sum(axis=1) > 0, table.sum(axis=0) > 0
+    table = table[rows][:, columns]
+    x_title = (labels or {}).get("x", column)
+    y_title = (labels or {}).get("y", row)
+    fig = go.Figure(go.Heatmap(
+        z=table,
+        x=[label for label, keep in zip(cube.labels[column], columns) if keep],
+        y=[label for label, keep in zip(cube.labels[row], rows) if keep],
+        colorscale=colorscale,
+        colorbar_title=_label(labels, "color"),
+        texttemplate="%{z}" if text_auto else None,
+        hovertemplate=f"{x_title}=%{{x}}<br>{y_title}=%{{y}}<br>{_label(labels, 'color')}=%{{z}}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        yaxis_autorange="reversed",
+    )
+    return fig
+
+
+def likert_bars(summary, group=0, *, labels=None, title=None, colors=None):
+    """100% stacked horizontal bars of each statement's ratings for one group."""
+    names = [_label(labels, item) for item in summary.items]
+    traces = []
+    for level in range(summary.distribution.shape[2]):
+        traces.append(go.Bar(
+            x=summary.shares[group, :, level],
+            y=names,
+            orientation="h",
+            name=str(level + 1),
+            customdata=summary.distribution[group, :, level],
+            hovertemplate="%{y}<br>Rating " + str(level + 1)
+                          + ": %{x:.1f}% (%{customdata})<extra></extra>",
+            marker_color=None if colors is None else colors[level % len(colors)],
+        ))
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title=title,
+        barmode="stack",
+        xaxis_title="% of answers",
+        xaxis_range=[0, 100],
+        yaxis_autorange="reversed",
+        legend_title="Rating",
+    )
+    return fig
+
+
+def matrix(z, x, y, *, labels=None, title=None, colorscale="YlGnBu",
+           zmin=None, zmax=None, text_format=".2f"):
+    """Heatmap of an already computed ``len(y)`` x ``len(x)`` matrix."""
+    x_title, y_title = _label(labels, "x"), _label(labels, "y")
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=x,
+        y=y,
+        zmin=zmin,
+        zmax=zmax,
+        colorscale=colorscale,
+        colorbar_title=_label(labels, "color"),
+        texttemplate=None if text_format is None else "%{z:" + text_format + "}",
+        hovertemplate=f"{x_title}=%{{x}}<br>{y_title}=%{{y}}<br>{_label(labels, 'color')}"
+                      f"=%{{z:{text_format or '.2f'}}}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=None if x_title == "x" else x_title,
+        yaxis_title=None if y_title == "y" else y_title,
+        yaxis_autorange="reversed",
+    )
+    return fig
+
+
+def fan(x, percentiles, *, levels, labels=None, title=None, color="31, 119, 180"):
+    """Fan chart: shaded bands between symmetric percentiles around the median.
+
+    ``percentiles`` is (len(levels) x len(x)), ``levels`` ascending and
+    centred on 50 (e.g. 10, 25, 50, 75, 90); ``color`` is an "r, g, b" string.
+    """
+    levels = list(levels)
+    middle = levels.index(50)
+    traces = []
+    for k in range(middle):
+        low, high = percentiles[k], percentiles[-1 - k]
+        opacity = 0.15 + 0.2 * k
+        name = f"P{levels[k]}-P{levels[-1 - k]}"
+        traces.append(go.Scatter(x=x, y=high, mode="lines", line_width=0,
+                                 showlegend=False, hoverinfo="skip", legendgroup=name))
+        traces.append(go.Scatter(
+            x=x, y=low, mode="lines", line_width=0, fill="tonexty",
+            fillcolor=f"rgba({color}, {opacity:.2f})", name=name, legendgroup=name,
+            customdata=high,
+            hovertemplate=f"{name}: %{{y:.2f}} - %{{customdata:.2f}}<extra></extra>",
+        ))
+    traces.append(go.Scatter(
+        x=x, y=percentiles[middle], mode="lines+markers", name="Median",
+        line_color=f"rgb({color})",
+        hovertemplate="Median: %{y:.2f}<extra></extra>",
+    ))
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title=title,
+        hovermode="x unified",
+        xaxis_title=_label(labels, "x"),
+        yaxis_title=_label(labels, "y"),
+    )
+    return fig
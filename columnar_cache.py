@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import csv_append
+from data_store import DATA_DIR, content_hash, dataset_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow ships with Streamlit, but the CSV path still works without it
+    pa = feather = None
+
+# ==================================================
+# COLUMNAR ON-DISK CACHE
+# ==================================================
+# Prepared survey frames (renamed columns, derived columns, categoricals) are
+# written as uncompressed Feather files stamped with the CSV version they came
+# from. Loading memory-maps the Feather file, so a warm start skips CSV
+# parsing and the column mapping entirely. A stale stamp means the caller
+# falls back to the CSV and writes a fresh copy, or, when the CSV only gained
+# rows since (see csv_append.py), parses just those and appends them. The
+# stamp also carries the CSV's content hash, so a redeploy that only gives
+# the same bytes a new mtime still finds its cached copy.
+
+# Folder for the converted files (override with SS2200_CACHE_DIR)
+CACHE_DIR = Path(os.environ.get("SS2200_CACHE_DIR", DATA_DIR / ".cache"))
+
+_STAMP_KEY = b"ss2200_source"
+
+
+def cache_path(name):
+    return CACHE_DIR / f"{name}.feather"
+
+
+def _stamp(version, schema_id, fingerprint=None, digest=None):
+    # The absolute path is left out so a moved checkout keeps its cache
+    return json.dumps({
+        "mtime_ns": version[1],
+        "size": version[2],
+        "schema": schema_id,
+        "fingerprint": fingerprint,
+        "digest": digest,
+    }).encode()
+
+
+def _same_file(stamp, version):
+    if (stamp.get("mtime_ns"), stamp.get("size")) == (version[1], version[2]):
+        return True
+    # Same size but a new mtime: compare the bytes themselves
+    return stamp.get("size") == version[2] and stamp.get("digest") is not None and (
+        stamp["digest"] == content_hash(version[0])
+    )
+
+
+def _read_table(name):
+    try:
+        table = feather.read_table(cache_path(name), memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None, {}
+    try:
+        stamp = json.loads((table.schema.metadata or {}).get(_STAMP_KEY, b"{}"))
+    except ValueError:
+        stamp = {}
+    return table, stamp
+
+
+def read(name, version, schema_id=""):
+    """Cached frame for ``name`` if it was written from ``version``, else None."""
+    if feather is None:
+        return None
+    table, stamp = _read_table(name)
+    if table is None or stamp.get("schema") != schema_id:
+        return None
+    if not _same_file(stamp, version):
+        return None
+    return table.to_pandas()
+
+
+def read_appendable(name, path, schema_id=""):
+    """(cached frame, byte offset) when ``path`` is the cached CSV plus new rows.
+
+    Returns (None, None) when the CSV was rewritten rather than appended to.
+    """
+    if feather is None:
+        return None, None
+    table, stamp = _read_table(name)
+    if table is None or stamp.get("schema") != schema_id:
+        return None, None
+    if not csv_append.is_append(path, stamp.get("size", 0), stamp.get("fingerprint")):
+        return None, None
+    return table.to_pandas(), stamp["size"]
+
+
+def write(name, version, df, schema_id="", fingerprint=None):
+    """Store ``df`` as the converted copy of ``name`` at ``version``."""
+    if feather is None:
+        return
+    path = cache_path(name)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    # Only hash the file when it is still the version df was read from
+    digest = content_hash(version[0]) if dataset_version(version[0]) == version else None
+    metadata[_STAMP_KEY] = _stamp(version, schema_id, fingerprint, digest)
+    table = table.replace_schema_metadata(metadata)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name first so readers never see half a file
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only checkout just means every cold start reads the CSV
+        pass
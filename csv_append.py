@@ -0,0 +1,72 @@
+import hashlib
+import io
+
+import pandas as pd
+
+# ==================================================
+# APPEND-ONLY CSV EXPORTS
+# ==================================================
+# The Google Forms exports only ever grow by new rows at the end. When a CSV
+# still starts with exactly the bytes we last read (the whole old file,
+# compared by content hash), only the rows after the old end need parsing.
+# fingerprint() is taken when a version is read; is_append() checks the
+# current file against it. Hashing the prefix reads it once, which is still
+# far cheaper than parsing it again. The exports usually end without a final
+# newline: their last row was complete when the grown file has a line break
+# right at the old end, and read_tail() starts after it.
+
+BLOCK = 1 << 20
+
+
+def fingerprint(path, size):
+    """Hash of the first ``size`` bytes of ``path`` (None when it has fewer)."""
+    if size <= 0:
+        return None
+    sha1 = hashlib.sha1()
+    try:
+        with open(path, "rb") as handle:
+            remaining = size
+            while remaining:
+                block = handle.read(min(BLOCK, remaining))
+                if not block:
+                    return None
+                sha1.update(block)
+                remaining -= len(block)
+    except OSError:
+        return None
+    return sha1.hexdigest()
+
+
+def is_append(path, size, digest):
+    """True when ``path`` is the file fingerprinted at ``size``, plus new rows."""
+    if digest is None:
+        return False
+    try:
+        with open(path, "rb") as handle:
+            handle.seek(size - 1)
+            around = handle.read(3)  # the old last byte and what follows it
+    except OSError:
+        return False
+    if not around:
+        return False
+    if around[:1] != b"\n" and len(around) > 1 and not around[1:].startswith((b"\n", b"\r\n")):
+        return False  # the old last row went on: it was still being written
+    return fingerprint(path, size) == digest
+
+
+def read_tail(path, offset, dtype=None):
+    """Parse the rows after byte ``offset`` with the file's own header.
+
+    A line break right at ``offset`` ends the old last row and is skipped.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        data = handle.read()
+    if data.startswith(b"\r\n"):
+        data = data[2:]
+    elif data.startswith(b"\n"):
+        data = data[1:]
+    if not data.strip():
+        return pd.DataFrame({column: pd.Series(dtype=(dtype or {}).get(column)) for column in columns})
+    return pd.read_csv(io.BytesIO(data), header=None, names=list(columns), dtype=dtype)
@@ -0,0 +1,179 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from aggregations import answer_order, count_table, encode
+from datasets import load_dataset, per_version, rows_since, share_arrays
+from perf import phase
+
+# ==================================================
+# CONTINGENCY-TABLE CUBE
+# ==================================================
+# At load time every categorical column is encoded once as integer codes and
+# its 1-D count table is precomputed as a dense NumPy array. Charts then
+# slice and sum those arrays (O(cells)) instead of grouping the rows. Tables
+# over more columns (a chart's axes, plus the sidebar filters) are counted
+# once on first use and kept for later reruns; a wide survey has thousands
+# of column pairs and the pages read a handful. When the survey only gained
+# rows, appended() counts just those into every stored table.
+
+# Columns with more distinct answers than this (timestamps, free text) are skipped
+MAX_CATEGORIES = 50
+
+
+def is_categorical(series, max_categories=MAX_CATEGORIES):
+    """True for string or numeric columns with few distinct answers."""
+    if not (
+        pd.api.types.is_string_dtype(series)
+        or pd.api.types.is_numeric_dtype(series)
+        or isinstance(series.dtype, pd.CategoricalDtype)
+    ):
+        return False
+    return series.nunique(dropna=True) <= max_categories
+
+
+class SurveyCube:
+    """Encoded categorical columns plus their precomputed count tables."""
+
+    def __init__(self, df, columns=None, tables=()):
+        if columns is None:
+            columns = [c for c in df.columns if is_categorical(df[c])]
+        self.columns = list(columns)
+        self.n_rows = len(df)
+        self.codes = {}
+        self.labels = {}
+        for column in self.columns:
+            self.codes[column], self.labels[column] = encode(df[column])
+
+        self._tables = {}
+        for column in self.columns:
+            self._table((column,))
+        # Only the multi-column tables asked for up front; the rest on first use
+        for columns in tables:
+            self._table(columns)
+
+    def shared(self, name):
+        """This cube with its codes mapped from the shared store (shared_store.py)."""
+        codes = share_arrays(name, "cube", [self.codes[c] for c in self.columns])
+        self.codes = dict(zip(self.columns, codes))
+        return self
+
+    def _table(self, columns):
+        """Count table over ``columns`` (stored in cube column order)."""
+        key = tuple(sorted(set(columns), key=self.columns.index))
+        table = self._tables.get(key)
+        if table is None:
+            shape = tuple(len(self.labels[c]) for c in key)
+            table = count_table([self.codes[c] for c in key], shape)
+            self._tables[key] = table
+        return key, table
+
+    def appended(self, rows):
+        """New cube with ``rows`` added: only the new rows are encoded and counted.
+
+        Answers seen for the first time are merged into the labels in answer
+        order, so the result matches a cube built from all the rows at once.
+        """
+        cube = copy.copy(self)
+        cube.n_rows = self.n_rows + len(rows)
+        cube.columns, cube.codes, cube.labels = [], {}, {}
+        new_codes, moved = {}, {}
+        for column in self.columns:
+            old_labels = self.labels[column]
+            _, found = encode(rows[column])
+            known = set(old_labels)
+            labels = old_labels
+            if any(label not in known for label in found):
+                labels = answer_order(rows[column], old_labels + [l for l in found if l not in known])
+                if len(labels) > MAX_CATEGORIES:
+                    # Grew into a free-text column: a fresh cube would skip it too
+                    continue
+                position = {label: i for i, label in enumerate(labels)}
+                moved[column] = np.array([position[label] for label in old_labels], dtype=np.int64)
+            codes, _ = encode(rows[column], labels)
+            old_codes = self.codes[column]
+            if column in moved:
+                old_codes = np.where(old_codes >= 0, moved[column][old_codes], -1)
+            new_codes[column] = codes
+            cube.columns.append(column)
+            cube.codes[column] = np.concatenate([old_codes, codes])
+            cube.labels[column] = labels
+
+        cube._tables = {}
+        for key, table in list(self._tables.items()):
+            if not all(c in new_codes for c in key):
+                continue
+            shape = tuple(len(cube.labels[c]) for c in key)
+            if any(c in moved for c in key):
+                grown = np.zeros(shape, dtype=table.dtype)
+                grown[np.ix_(*[moved.get(c, np.arange(n)) for c, n in zip(key, table.shape)])] = table
+                table = grown
+            cube._tables[key] = table + count_table([new_codes[c] for c in key], shape)
+        return cube
+
+    @phase("aggregate")
+    def counts(self, *columns, where=None):
+        """Dense counts over ``columns`` for rows whose answers are in ``where``.
+
+        ``where`` maps a column to the answers to keep, like chaining
+        ``df[column].isin(values)`` filters.
+        """
+        where = where or {}
+        key, table = self._table(list(columns) + list(where))
+
+        for axis, column in enumerate(key):
+            if column in where:
+                keep = pd.Index(self.labels[column]).isin(list(where[column]))
+                shape = [1] * table.ndim
+                shape[axis] = -1
+                table = table * keep.reshape(shape)
+
+        positions = [key.index(c) for c in columns]
+        others = tuple(i for i in range(len(key)) if i not in positions)
+        table = table.sum(axis=others)
+        kept = sorted(positions)
+        return np.transpose(table, [kept.index(p) for p in positions])
+
+    def total(self, where=None):
+        """Number of respondents matching ``where``."""
+        if not where:
+            return self.n_rows
+        return int(self.counts(*where, where=where).sum())
+
+    @phase("aggregate")
+    def long(self, *columns, where=None, value_name="Count"):
+        """Long-format counts (zero combinations dropped), ready for Plotly."""
+        table = self.counts(*columns, where=where)
+        index = pd.MultiIndex.from_product(
+            [self.labels[c] for c in columns], names=list(columns)
+        )
+        frame = pd.DataFrame({value_name: table.ravel()}, index=index).reset_index()
+        return frame[frame[value_name] > 0].reset_index(drop=True)
+
+    @phase("aggregate")
+    def crosstab(self, row, column, where=None):
+        """Equivalent of ``pd.crosstab`` on the filtered rows."""
+        table = pd.DataFrame(
+            self.counts(row, column, where=where),
+            index=pd.Index(self.labels[row], name=row),
+            columns=pd.Index(self.labels[column], name=column),
+        )
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+
+def _refresh_cube(cube, since, name, tables=()):
+    rows = rows_since(name, since)
+    if rows is None:
+        return None
+    with phase("index"):
+        return cube.appended(rows).shared(name)
+
+
+@per_version(refresh=_refresh_cube)
+def survey_cube(name, tables=()):
+    """Cube for dataset ``name``, rebuilt when its CSV changes; ``tables``
+    lists column tuples to count up front."""
+    df = load_dataset(name)
+    with phase("index"):
+        return SurveyCube(df, tables=tables).shared(name)
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from perf import phase
+
+# ==================================================
+# SHARED DATA ACCESS
+# ==================================================
+# Every page reads its survey CSVs through this module. Each file is parsed
+# once per process and kept until it changes on disk (path + mtime + size),
+# so widget reruns and page switches reuse the same frame.
+
+# Folder the survey CSVs are read from (override with SS2200_DATA_DIR)
+DATA_DIR = Path(os.environ.get("SS2200_DATA_DIR", Path(__file__).resolve().parent))
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # pandas 3 always copies on write; older versions need it switched on so
+    # the shallow copies handed out below never write into the shared frame
+    pd.set_option("mode.copy_on_write", True)
+
+_lock = threading.Lock()
+_frames = {}  # resolved path -> (version, frame)
+_digests = {}  # version -> content hash
+
+
+def data_path(filename):
+    """Resolve a CSV name against DATA_DIR (absolute paths are kept)."""
+    path = Path(filename)
+    return path if path.is_absolute() else DATA_DIR / path
+
+
+def dataset_version(filename):
+    """Return the (path, mtime, size) key that identifies the current file."""
+    path = data_path(filename)
+    stat = path.stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def content_hash(filename):
+    """SHA-1 of the file's bytes, computed once per version.
+
+    Unlike the version key it survives a fresh checkout or copy, which
+    gives the same bytes a new mtime.
+    """
+    version = dataset_version(filename)
+    digest = _digests.get(version)
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(version[0], "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                sha1.update(block)
+        digest = _digests[version] = sha1.hexdigest()
+    return digest
+
+
+def load_csv(filename):
+    """Return the parsed CSV, reading it from disk only when it has changed.
+
+    The frame is shared by every session, so callers get a shallow
+    copy-on-write view: adding or changing columns never leaks back into the
+    cached copy.
+    """
+    version = dataset_version(filename)
+    cached = _frames.get(version[0])
+
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _frames.get(version[0])
+            if cached is None or cached[0] != version:
+                with phase("parse"):
+                    cached = (version, pd.read_csv(version[0]))
+                _frames[version[0]] = cached
+
+    return cached[1].copy(deep=False)
+
+
+def clear_cache():
+    """Drop every cached frame (they are re-read on next access)."""
+    with _lock:
+        _frames.clear()
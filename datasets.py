@@ -0,0 +1,563 @@
+import collections
+import functools
+import hashlib
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+import columnar_cache
+import csv_append
+import remote_fetch
+import schema
+import shared_store
+from data_store import data_path, dataset_version as file_version
+from disk_cache import code_hash, disk_cache
+from perf import phase
+from schema import (
+    CGPA_BINS, FREQUENCY, YEARS, YES_NO_UNSURE,
+    Category, Integer, Likert, Number, YesNo, pattern, starts,
+)
+
+# ==================================================
+# SURVEY DATASETS
+# ==================================================
+# Each survey CSV is registered once with the column mapping and derived
+# columns the pages expect. load_dataset() returns the prepared frame, read
+# from the columnar cache when it matches the CSV and rebuilt from the CSV
+# (then written back to the cache) when it does not. When a CSV only gained
+# rows at the end (the Google Forms exports are re-downloaded as they grow),
+# just the new rows are parsed and appended, and the caches built on top of
+# the frame (per_version(refresh=...)) add them instead of starting over.
+
+# String columns with at most this many distinct answers are stored as categoricals
+MAX_CATEGORIES = 50
+
+
+@dataclass
+class Dataset:
+    name: str
+    file: str
+    rename: dict = field(default_factory=dict)
+    derive: object = None  # function(df) -> df adding derived columns
+    url: str = None  # remote copy to mirror; the bundled file is the offline fallback
+    schema: dict = field(default_factory=dict)  # column -> type, see schema.py
+
+    @functools.cached_property
+    def schema_id(self):
+        """Fingerprint of the preparation steps, so cached copies go stale with them.
+
+        The code is fingerprinted by source (disk_cache.code_hash), so an edited
+        constant or helper counts too.
+        """
+        parts = [
+            repr(sorted(self.rename.items())),
+            str(MAX_CATEGORIES),
+            code_hash(normalise_answers),
+            code_hash(normalise_answer),
+            schema.fingerprint(self.schema),
+        ]
+        if self.derive is not None:
+            parts.append(code_hash(self.derive))
+        return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:16]
+
+
+INTERNET_USE_COLUMNS = {
+    "Gender / Jantina:": "Gender",
+    "Year of Study / Tahun Belajar:": "Year_of_Study",
+    "Race / Bangsa:": "Race",
+    "Employment Status / Status Pekerjaan:": "Employment_Status",
+    "Current living situation / Keadaan hidup sekarang:": "Current_Living_Situation",
+    "Social media has a generally positive impact on my wellbeing. / Media sosial secara amnya mempunyai kesan positif terhadap kesejahteraan saya.":
+        "Social_Media_Positive_Impact_on_Wellbeing",
+    "I have difficulty sleeping due to university-related pressure. / Saya sukar tidur kerana tekanan berkaitan universiti.":
+        "Difficulty_Sleeping_University_Pressure",
+    "Using social media is an important part of my daily routine. / Menggunakan media sosial adalah bahagian penting dalam rutin harian saya.":
+        "Social_Media_Daily_Routine"
+}
+
+
+_YEAR = re.compile(r"year\s*(\d)", re.IGNORECASE)
+
+
+def normalise_answer(value):
+    """Trim stray spaces and spell "year 1" style answers as "Year 1"."""
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    match = _YEAR.fullmatch(value)
+    return f"Year {match.group(1)}" if match else value
+
+
+def normalise_answers(df):
+    """normalise_answer() over every text column (each distinct answer once)."""
+    for column in df.columns:
+        if pd.api.types.is_string_dtype(df[column]):
+            mapping = {value: normalise_answer(value) for value in df[column].dropna().unique()}
+            if any(key != value for key, value in mapping.items()):
+                df[column] = df[column].map(mapping)
+    return df
+
+
+def add_year_number(df):
+    df["Year_Num"] = df["Year_of_Study"].astype("str").str.extract(r"(\d)", expand=False)
+    return df
+
+
+STUDENT_MENTAL_HEALTH_SCHEMA = {
+    "Choose your gender": Category(),
+    "What is your course?": Category(),
+    "Your current year of Study": Category(YEARS),
+    "What is your CGPA?": Category(CGPA_BINS),
+    starts("Do you have "): YesNo(),
+    "Did you seek any specialist for a treatment?": YesNo(),
+}
+
+INTERNET_USE_SCHEMA = {
+    "Age / Umur:": Integer("Int8"),
+    "Gender": Category(),
+    "Race": Category(),
+    "Year_of_Study": Category(YEARS + ["Postgraduate (Master's/PhD)"]),
+    "Year_Num": Integer("Int8"),
+    "Employment_Status": Category(),
+    "Current_Living_Situation": Category(),
+    starts("How would you describe your general academic performance?"):
+        Category(["Below average", "Average", "Good", "Excellent"]),
+    starts("How many hours do you study per week"):
+        Category(["Less than 5 hours", "5–10 hours", "11–15 hours", "16–20 hours", "More than 20 hours"]),
+    starts("How often do you use social media?"):
+        Category(["Less than 1 hour per day", "1–2 hours per day", "3–4 hours per day",
+                  "5–6 hours per day", "More than 6 hours per day"]),
+    starts("I use the Internet to look for mental health information"): Category(FREQUENCY),
+    starts("I have come across upsetting or disturbing content online."): Category(FREQUENCY),
+    starts("I use online communities for academic or emotional support."): Category(FREQUENCY),
+    starts("I know where to find reliable mental health information online."): Category(YES_NO_UNSURE),
+    starts("Do you think universities should provide more online mental health"): Category(YES_NO_UNSURE),
+    starts("I follow accounts that post motivational or mental health content."): YesNo(),
+    # The remaining "I ..." / "Social media ..." statements are 1-5 agreement ratings
+    "Social_Media_Positive_Impact_on_Wellbeing": Likert(),
+    "Difficulty_Sleeping_University_Pressure": Likert(),
+    "Social_Media_Daily_Routine": Likert(),
+    pattern(r"(I |Social media |When I feel stressed).*"): Likert(),
+}
+
+ARTS_FACULTY_SCHEMA = {
+    "Gender": Category(),
+    "Faculty": Category(),
+    "Arts Program": Category(),
+    "Bachelor  Academic Year in EU": Category(["1st Year", "2nd Year", "3rd Year", "4th Year"]),
+    "Masters Academic Year in EU": Category(["1st Year", "2nd Year"]),
+    "S.S.C (GPA)": Number(),
+    "H.S.C (GPA)": Number(),
+    pattern(r"\d(st|nd|rd|th) Year Semester \d"): Number(),
+    "Regular/Irregular": Integer("Int8"),
+    starts("Did you ever attend a Coaching center?"): YesNo(),
+    pattern(r"(Area of Evaluation|Item|Q\d) \[.*"): Likert(),
+    starts("Do you feel that"): YesNo(),
+}
+
+
+DATASETS = {
+    "student_mental_health": Dataset(
+        "student_mental_health",
+        "Student_Mental_Health.csv",
+        schema=STUDENT_MENTAL_HEALTH_SCHEMA,
+    ),
+    "internet_use": Dataset(
+        "internet_use",
+        "Exploring Internet Use and Suicidality in Mental Health Populations.csv",
+        rename=INTERNET_USE_COLUMNS,
+        derive=add_year_number,
+        schema=INTERNET_USE_SCHEMA,
+    ),
+    "arts_faculty": Dataset(
+        "arts_faculty",
+        "arts_faculty_data.csv",
+        url="https://raw.githubusercontent.com/s22a0050-ainun/SS2200/refs/heads/main/arts_faculty_data.csv",
+        schema=ARTS_FACULTY_SCHEMA,
+    ),
+}
+
+
+def source_path(name):
+    """CSV file dataset ``name`` is read from (the local mirror for remote datasets)."""
+    dataset = DATASETS[name]
+    local = data_path(dataset.file)
+    if dataset.url:
+        if local.exists():
+            remote_fetch.seed(dataset.url, local)
+        try:
+            return remote_fetch.fetch(dataset.url)
+        except remote_fetch.FetchError:
+            pass
+    return local
+
+
+# Versions pages see while the watcher (watcher.py) runs: name -> version
+_published = {}
+# Versions fixed for this thread: the one the watcher's thread is building,
+# or every version a page run looked up (pinned_run)
+_pinned = threading.local()
+# (name, version) -> page runs pinned to it right now
+_in_use = collections.Counter()
+_in_use_lock = threading.Lock()
+
+
+def _current_version(name):
+    version = _published.get(name)
+    return version if version is not None else file_version(source_path(name))
+
+
+def dataset_version(name):
+    """Version key of the CSV behind dataset ``name``.
+
+    While the watcher runs this is the last version it finished building,
+    so reruns never wait for a rebuild or read an export being written.
+    Inside pinned_run() it is the version the run saw first.
+    """
+    versions = getattr(_pinned, "versions", None)
+    if versions is not None and name in versions:
+        return versions[name]
+    version = _current_version(name)
+    held = getattr(_pinned, "held", None)
+    if held is not None:
+        versions[name] = version
+        _hold(held, name, version)
+    return version
+
+
+def _watched(name):
+    building = getattr(_pinned, "held", None) is None and name in (getattr(_pinned, "versions", None) or {})
+    return name in _published or building
+
+
+def published_version(name):
+    """Version the watcher last published for ``name`` (None before the first)."""
+    return _published.get(name)
+
+
+@contextmanager
+def building_version(name, version):
+    """Make dataset_version(name) return ``version`` in this thread."""
+    versions = getattr(_pinned, "versions", None)
+    _pinned.versions = {**(versions or {}), name: version}
+    try:
+        yield
+    finally:
+        _pinned.versions = versions
+
+
+def _hold(held, name, version):
+    with _in_use_lock:
+        _in_use[(name, version)] += 1
+    held.append((name, version))
+
+
+def _release(held):
+    with _in_use_lock:
+        _in_use.subtract(held)
+        done = [key for key in set(held) if _in_use[key] <= 0]
+        for key in done:
+            del _in_use[key]
+    # The last run on an unpublished version drops its results
+    for name, version in done:
+        published = _published.get(name)
+        if published is not None and published != version:
+            _discard(name)
+
+
+def _in_use_versions(name):
+    with _in_use_lock:
+        return {version for key_name, version in _in_use if key_name == name}
+
+
+@contextmanager
+def pinned_run(versions=None):
+    """Keep dataset_version() at the first version seen, for this thread.
+
+    A page run reads every dataset at one version even when the watcher
+    publishes a newer one halfway through. ``versions`` (name -> version)
+    is filled in as datasets are looked up, so code that runs later for the
+    same page (fragment reruns, build pool tasks) can be pinned to the same
+    versions. Results of a version stay cached while a run is pinned to it.
+    """
+    saved = getattr(_pinned, "versions", None), getattr(_pinned, "held", None)
+    versions = {} if versions is None else versions
+    held = []
+    for name, version in list(versions.items()):
+        _hold(held, name, version)
+    _pinned.versions, _pinned.held = versions, held
+    try:
+        yield versions
+    finally:
+        _pinned.versions, _pinned.held = saved
+        _release(held)
+
+
+def run_versions():
+    """The versions of the pinned_run() this thread is in (None outside one)."""
+    return getattr(_pinned, "versions", None) if getattr(_pinned, "held", None) is not None else None
+
+
+def outdated(versions):
+    """Whether any of ``versions`` (name -> version) is no longer the current one."""
+    return any(_current_version(name) != version for name, version in versions.items())
+
+
+def _discard(name):
+    keep = _in_use_versions(name)
+    for cached in _memoised:
+        cached.discard(name, _published[name], keep)
+
+
+def publish_version(name, version):
+    """Switch every session to ``version`` of ``name`` and drop older results
+    (except those of versions a page run is still pinned to)."""
+    _published[name] = version
+    _discard(name)
+
+
+def clean(dataset, df):
+    """Column mapping, normalised answers, derived columns and schema types.
+
+    Works row by row, so it can be applied to each chunk of a streamed CSV.
+    """
+    df = normalise_answers(df.rename(columns=dataset.rename))
+    if dataset.derive is not None:
+        df = dataset.derive(df)
+    return schema.apply_schema(dataset.schema, df)
+
+
+def prepare(dataset, df):
+    """clean() plus categorical dtypes for the columns with few answers."""
+    df = clean(dataset, df)
+    for column in df.columns:
+        if pd.api.types.is_string_dtype(df[column]) and df[column].nunique() <= MAX_CATEGORIES:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def convert(name):
+    """Write the prepared copy of ``name`` to the columnar cache and return it."""
+    dataset = DATASETS[name]
+    version = dataset_version(name)
+    with phase("parse"):
+        df = prepare(dataset, pd.read_csv(version[0]))
+    columnar_cache.write(
+        name, version, df, dataset.schema_id,
+        csv_append.fingerprint(Path(version[0]), version[2]),
+    )
+    return df
+
+
+def append_rows(df, rows):
+    """``df`` followed by ``rows``, keeping its categorical columns categorical.
+
+    A column that grew past MAX_CATEGORIES answers goes back to text, as
+    prepare() would leave it for the whole file.
+    """
+    df = df.copy(deep=False)
+    rows = rows.reindex(columns=df.columns)
+    grown = []
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            categories = df[column].cat.categories
+            new = pd.Index(rows[column].dropna().unique()).difference(categories)
+            if len(new):
+                df[column] = df[column].cat.add_categories(new)
+                grown.append(column)
+            rows[column] = pd.Categorical(rows[column], categories=df[column].cat.categories)
+    df = pd.concat([df, rows], ignore_index=True)
+    for column in grown:
+        if df[column].nunique() > MAX_CATEGORIES:
+            df[column] = df[column].astype("str")
+    return df
+
+
+def _append_tail(dataset, df, path, offset):
+    # Text columns are read as text even when the new rows look numeric
+    text = {
+        column for column in df.columns
+        if pd.api.types.is_string_dtype(df[column]) or isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+    header = pd.read_csv(path, nrows=0).columns
+    dtype = {raw: "str" for raw in header if dataset.rename.get(raw, raw) in text}
+    with phase("parse"):
+        rows = clean(dataset, csv_append.read_tail(path, offset, dtype))
+    return append_rows(df, rows)
+
+
+# Results kept per (name, args): the published version and the one being built
+VERSIONS_KEPT = 2
+
+_memoised = []  # every per_version function, so the watcher can rebuild them
+
+
+def per_version(build=None, *, refresh=None, persist=False):
+    """Memoise ``build(name, *args)`` until the CSV behind ``name`` changes.
+
+    With ``refresh``, a stale result is first offered to
+    ``refresh(previous, since, name, *args)``, which may return an updated
+    result (e.g. with rows_since(name, since) added) or None to rebuild.
+    With ``persist``, results are also kept in the disk cache (disk_cache.py)
+    under the CSV's content and ``build``'s code, so they outlive restarts;
+    only use it for small, picklable results.
+
+    The last VERSIONS_KEPT versions are kept, so sessions still on the
+    published version keep their results while the next one is built.
+    """
+    if build is None:
+        return functools.partial(per_version, refresh=refresh, persist=persist)
+
+    def stored(name, version, *args):
+        key = disk_cache.key(
+            build.__module__, build.__qualname__, name, args, DATASETS[name].schema_id,
+            disk_cache.source_digest(version), code_hash(build),
+        )
+        return disk_cache.get_or_build(key, lambda: build(name, *args))
+
+    lock = threading.Lock()
+    results = {}  # (name, args) -> {version: result}, oldest first; replaced, never changed
+
+    @functools.wraps(build)
+    def cached(name, *args):
+        version = dataset_version(name)
+        versions = results.get((name, args), {})
+        if version in versions:
+            return versions[version]
+        with lock:
+            versions = results.get((name, args), {})
+            if version not in versions:
+                result = None
+                if versions and refresh is not None:
+                    since = next(reversed(versions))
+                    result = refresh(versions[since], since, name, *args)
+                if result is None:
+                    result = stored(name, version, *args) if persist else build(name, *args)
+                versions = {**versions, version: result}
+                # Without the watcher nobody is left on the older version;
+                # versions a page run is pinned to are kept regardless
+                kept = VERSIONS_KEPT if _watched(name) else 1
+                busy = _in_use_versions(name) | {version}
+                for old in [v for v in versions if v not in busy][:max(0, len(versions) - kept)]:
+                    del versions[old]
+                results[(name, args)] = versions
+            return versions[version]
+
+    def used(name):
+        """The ``args`` this function has been called with for ``name``."""
+        return [args for key_name, args in list(results) if key_name == name]
+
+    def discard(name, version, keep=()):
+        """Once ``version`` is built, drop older results except those of ``keep``."""
+        with lock:
+            for key, versions in list(results.items()):
+                if key[0] == name and version in versions:
+                    results[key] = {v: result for v, result in versions.items() if v == version or v in keep}
+
+    cached.cache_clear = results.clear
+    cached.used = used
+    cached.discard = discard
+    _memoised.append(cached)
+    return cached
+
+
+# Versions whose rows are the first rows of the loaded frame, per dataset:
+# name -> {version: (row count, csv_append fingerprint)}
+_lineage = {}
+_LINEAGE_KEEP = 100
+
+
+def _remember(name, version, df, reset):
+    lineage = {} if reset else dict(_lineage.get(name, {}))
+    lineage[version] = (len(df), csv_append.fingerprint(Path(version[0]), version[2]))
+    while len(lineage) > _LINEAGE_KEEP:
+        lineage.pop(next(iter(lineage)))
+    _lineage[name] = lineage
+
+
+def _refresh_load(df, since, name):
+    known = _lineage.get(name, {}).get(since)
+    dataset = DATASETS[name]
+    version = dataset_version(name)
+    path = Path(version[0])
+    if known is None or not csv_append.is_append(path, since[2], known[1]):
+        return None
+    # The rows are only parsed once per machine: other workers attach
+    with shared_store.building(name):
+        shared = shared_store.attach(name, version, dataset.schema_id)
+        if shared is None:
+            df = _append_tail(dataset, df, path, since[2])
+            df = shared_store.publish(name, version, df, dataset.schema_id)
+        else:
+            df = shared
+    _remember(name, version, df, reset=False)
+    return df
+
+
+def _read(dataset, version):
+    name = dataset.name
+    df = columnar_cache.read(name, version, dataset.schema_id)
+    if df is None:
+        # A cached copy of an older, shorter export only needs the new rows
+        path = Path(version[0])
+        df, offset = columnar_cache.read_appendable(name, path, dataset.schema_id)
+        if df is not None:
+            df = _append_tail(dataset, df, path, offset)
+            columnar_cache.write(
+                name, version, df, dataset.schema_id,
+                csv_append.fingerprint(path, version[2]),
+            )
+    if df is None:
+        df = convert(name)
+    return df
+
+
+@per_version(refresh=_refresh_load)
+def _load(name):
+    dataset = DATASETS[name]
+    version = dataset_version(name)
+    # Every worker on the machine maps the same shared copy (shared_store.py)
+    df = shared_store.attach(name, version, dataset.schema_id)
+    if df is None:
+        with shared_store.building(name):
+            df = shared_store.attach(name, version, dataset.schema_id)
+            if df is None:
+                df = shared_store.publish(name, version, _read(dataset, version), dataset.schema_id)
+    _remember(name, version, df, reset=True)
+    return df
+
+
+def share_arrays(name, kind, arrays):
+    """shared_store.share() for ``arrays`` built from the current version of ``name``."""
+    return shared_store.share(name, dataset_version(name), kind, arrays, DATASETS[name].schema_id)
+
+
+def rows_since(name, version):
+    """Rows appended to dataset ``name`` since ``version``.
+
+    None when the CSV was rewritten since (or ``version`` is unknown), in
+    which case anything built from that version has to be rebuilt.
+    """
+    df = _load(name)
+    known = _lineage.get(name, {}).get(version)
+    if known is None:
+        return None
+    return df.iloc[known[0]:]
+
+
+def rebuild(name):
+    """Load ``name`` and every per_version result used for it, at the current version."""
+    load_dataset(name)
+    for cached in _memoised:
+        for args in cached.used(name):
+            cached(name, *args)
+
+
+def load_dataset(name):
+    """Prepared frame for dataset ``name`` (a shallow copy-on-write view)."""
+    with phase("load"):
+        return _load(name).copy(deep=False)
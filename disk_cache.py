@@ -0,0 +1,349 @@
+import ast
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from columnar_cache import CACHE_DIR
+from data_store import content_hash, dataset_version
+
+# ==================================================
+# PERSISTENT AGGREGATE CACHE
+# ==================================================
+# The in-process caches (per_version, the figure cache, Likert summaries)
+# start empty after every restart or deploy. Small results behind them are
+# also pickled into one SQLite file next to the columnar cache, keyed by the
+# content hash of the source CSV and the hash of the code that built them
+# (the build's module and every app module it imports, directly or not).
+# A restarted process (or another worker) then finds them without running
+# the build, and an edited module or a changed CSV simply misses. The file
+# is bounded by size: least recently used entries go first, and values
+# estimated larger than ENTRY_BYTES are not even pickled.
+
+ENABLED = os.environ.get("SS2200_DISK_CACHE", "1") not in ("", "0")
+
+# Size cap of the cache file's entries (override with SS2200_DISK_CACHE_MB)
+MAX_BYTES = int(float(os.environ.get("SS2200_DISK_CACHE_MB", 256)) * 2**20)
+
+# Largest value kept (override with SS2200_DISK_CACHE_ENTRY_MB): the cache
+# is for small results, not row-sized arrays
+ENTRY_BYTES = int(float(os.environ.get("SS2200_DISK_CACHE_ENTRY_MB", 16)) * 2**20)
+
+CACHE_FILE = CACHE_DIR / "aggregates.sqlite"
+
+# A hit only refreshes an entry's last-used time once it is this old, so
+# reads stay reads and do not queue on the file's write lock
+TOUCH_SECONDS = 600
+
+# Entries pickled under other library versions are never read back
+_SALT = "|".join([
+    "1", sys.version.split()[0], np.__version__, pd.__version__, plotly.__version__,
+])
+
+_APP_DIR = Path(__file__).resolve().parent
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (path, mtime_ns, size)
+);
+"""
+
+_file_digests = {}  # (path, mtime_ns, size) -> sha1 of a source file
+
+
+def _source_digest(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    version = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(version)
+    if digest is None:
+        with open(path, "rb") as handle:
+            digest = _file_digests[version] = hashlib.sha1(handle.read()).hexdigest()
+    return digest
+
+
+def _app_module_file(obj):
+    """Source file of ``obj`` (a module, function or class) when it is part of the app."""
+    if isinstance(obj, type(sys)):
+        path = getattr(obj, "__file__", None)
+    else:
+        module = sys.modules.get(getattr(obj, "__module__", None) or "")
+        path = getattr(module, "__file__", None)
+    if path is None:
+        return None
+    path = Path(path).resolve()
+    return str(path) if path.parent == _APP_DIR and path.suffix == ".py" else None
+
+
+_imports = {}  # (source file, digest) -> app source files it imports
+
+
+def _app_imports(path):
+    """App source files that ``path`` imports anywhere (also inside functions),
+    read from its source so the answer does not depend on import order."""
+    key = (path, _source_digest(path))
+    imported = _imports.get(key)
+    if imported is None:
+        names = set()
+        try:
+            tree = ast.parse(Path(path).read_bytes())
+        except (OSError, SyntaxError, ValueError):
+            tree = ast.Module(body=[], type_ignores=[])
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.add(node.module)
+        files = (_APP_DIR / f"{name.partition('.')[0]}.py" for name in names)
+        imported = _imports[key] = sorted(str(file) for file in files if file.exists())
+    return imported
+
+
+def code_hash(fn):
+    """Digest of the source files ``fn`` depends on: its own module (or page
+    script), every app module, function or class its code names, and every
+    app module those import in turn."""
+    files = set()
+    own = fn.__globals__.get("__file__")
+    if own:
+        files.add(str(Path(own).resolve()))
+
+    codes = [fn.__code__]
+    while codes:
+        code = codes.pop()
+        codes.extend(c for c in code.co_consts if hasattr(c, "co_code"))
+        for name in code.co_names:
+            obj = fn.__globals__.get(name)
+            path = _app_module_file(obj) if obj is not None else None
+            if path is not None:
+                files.add(path)
+
+    pending = list(files)
+    while pending:
+        for path in _app_imports(pending.pop()):
+            if path not in files:
+                files.add(path)
+                pending.append(path)
+
+    sha1 = hashlib.sha1(fn.__code__.co_code)
+    for path in sorted(files):
+        # By file name, so a moved checkout keeps its entries
+        sha1.update(f"{Path(path).name}:{_source_digest(path)}".encode())
+    return sha1.hexdigest()
+
+
+def estimated_size(value):
+    """Rough size in bytes of ``value``'s data, without pickling it: arrays,
+    frames, strings, containers and the attributes of plain objects."""
+    size = 0
+    seen = set()
+    pending = [value]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            size += obj.nbytes
+            if obj.dtype == object:
+                pending.extend(obj.ravel().tolist())
+        elif isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+            usage = obj.memory_usage(deep=True)
+            size += int(usage.sum() if hasattr(usage, "sum") else usage)
+        elif isinstance(obj, (str, bytes, bytearray)):
+            size += len(obj)
+        elif isinstance(obj, dict):
+            size += 8 * len(obj)
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += 8 * len(obj)
+            pending.extend(obj)
+        elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+            pending.append(vars(obj))
+        else:
+            size += 8
+    return size
+
+
+class DiskCache:
+    """Size-bounded LRU cache of pickled values in an SQLite file."""
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_BYTES, entry_bytes=ENTRY_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.entry_bytes = min(entry_bytes, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()  # one connection per thread
+        self._lock = threading.Lock()
+        self._digests = {}  # CSV version -> content hash
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def key(self, *parts):
+        """Entry key for ``parts`` (anything with a stable repr)."""
+        return hashlib.sha1(repr((_SALT,) + parts).encode()).hexdigest()
+
+    def get(self, key, default=None):
+        if not ENABLED:
+            return default
+        try:
+            db = self._connect()
+            row = db.execute("SELECT value, used FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value = pickle.loads(row[0])
+        except (OSError, sqlite3.Error, pickle.UnpicklingError, AttributeError, ImportError):
+            # A broken or unreadable entry is just a miss
+            row = None
+        self._count(row is not None)
+        if row is None:
+            return default
+        now = time.time()
+        if now - row[1] > TOUCH_SECONDS:
+            try:
+                db.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                pass  # the entry is just evicted a little earlier
+        return value
+
+    def put(self, key, value):
+        if not ENABLED or estimated_size(value) > self.entry_bytes:
+            return
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        if len(data) > self.entry_bytes:
+            return
+        try:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, used) VALUES (?, ?, ?, ?)",
+                    (key, data, len(data), time.time()),
+                )
+                self._evict(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        except (OSError, sqlite3.Error):
+            # A read-only or full disk only means this result is not kept
+            pass
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Least recently used first, until the entries fit again
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY used").fetchall():
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_or_build(self, key, build):
+        """The cached value for ``key``, building and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def source_digest(self, version):
+        """Content hash of the CSV at ``version`` (path, mtime, size).
+
+        Kept in the cache file too, so a restart does not hash large
+        exports again.
+        """
+        digest = self._digests.get(version)
+        if digest is not None:
+            return digest
+        row = None
+        if ENABLED:
+            try:
+                row = self._connect().execute(
+                    "SELECT digest FROM sources WHERE path = ? AND mtime_ns = ? AND size = ?",
+                    version,
+                ).fetchone()
+            except (OSError, sqlite3.Error):
+                pass
+        if row is not None:
+            digest = row[0]
+        else:
+            digest = content_hash(version[0])
+            if dataset_version(version[0]) != version:
+                return digest  # the file changed meanwhile: do not record it
+            if ENABLED:
+                try:
+                    self._connect().execute(
+                        "INSERT OR REPLACE INTO sources (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                        (*version, digest),
+                    )
+                except (OSError, sqlite3.Error):
+                    pass
+        self._digests[version] = digest
+        return digest
+
+    def stats(self):
+        """Hits, misses, entries and bytes stored."""
+        entries = size = 0
+        if ENABLED:
+            try:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+            except (OSError, sqlite3.Error):
+                pass
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def clear(self):
+        try:
+            self._connect().execute("DELETE FROM entries")
+        except (OSError, sqlite3.Error):
+            pass
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+disk_cache = DiskCache()
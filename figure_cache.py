@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.io as pio
+from plotly.basedatatypes import BaseFigure, BasePlotlyType
+
+from disk_cache import code_hash, disk_cache
+from perf import phase
+
+# ==================================================
+# FIGURE CACHE
+# ==================================================
+# Plotly Express figure construction is the slowest part of a rerun, so every
+# chart is built once per (dataset version, chart id, filter state) and kept
+# in a process-wide LRU cache. Entries are the Figure objects st.plotly_chart
+# is given (it serialises them itself), and each counts against the memory
+# cap with the size of its whole object tree, several times its JSON. The
+# JSON goes to the disk cache (disk_cache.py) under the CSV's content and
+# the page's code, so after a restart figures are read back instead of
+# built again.
+
+# Memory cap for cached figures (override with SS2200_FIGURE_CACHE_MB)
+MAX_BYTES = int(float(os.environ.get("SS2200_FIGURE_CACHE_MB", 64)) * 2**20)
+
+
+def filter_key(filters=None):
+    """Order-independent, hashable form of a {column: selected values} dict."""
+    return tuple(
+        (column, tuple(sorted(map(str, values))))
+        for column, values in sorted((filters or {}).items())
+    )
+
+
+def figure_bytes(figure):
+    """Memory held by ``figure``: its dicts, lists, arrays and Plotly objects."""
+    seen, stack, total = set(), [figure], 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, np.ndarray) and obj.base is not None:
+            total += obj.nbytes  # a view: getsizeof left out the data
+        elif isinstance(obj, (BaseFigure, BasePlotlyType)):
+            stack.append(vars(obj))
+    return total
+
+
+class FigureCache:
+    """Size-bounded LRU cache of built figures."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (figure, bytes)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, figure):
+        size = figure_bytes(figure)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (figure, size)
+            self.bytes += size
+            # Evict least recently used entries, but always keep the new one
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.bytes -= old_size
+        return figure
+
+    def get_or_build(self, key, build):
+        """Return the cached figure for ``key``, building it on a miss."""
+        figure = self.get(key)
+        if figure is None:
+            with phase("figure"):
+                figure = self.put(key, build())
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(version, chart_id, filters, build):
+    """Figure for ``chart_id``; ``build()`` only runs for unseen states.
+
+    The returned figure is shared between sessions, so ``build`` must
+    finish all layout updates itself and callers must not modify it.
+    """
+    key = (version, chart_id, filter_key(filters))
+    figure = figure_cache.get(key)
+    if figure is None:
+        stored = disk_cache.key(
+            "figure", chart_id, key[2], disk_cache.source_digest(version), code_hash(build)
+        )
+        spec = disk_cache.get(stored)
+        if spec is not None:
+            with phase("figure"):
+                figure = figure_cache.put(key, pio.from_json(spec, skip_invalid=True))
+        else:
+            with phase("figure"):
+                figure = figure_cache.put(key, build())
+            disk_cache.put(stored, pio.to_json(figure, validate=False))
+    return figure
@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
-st.title("Gender vs Mental Health")
+from aggregations import CONDITIONS, DEPRESSION, GENDER, survey_counts
+from datasets import dataset_version
+from figure_cache import cached_figure
+from perf import plotly_chart
 
-# Load the main DataFrame (df is not directly used for the metrics/charts below)
-df = pd.read_csv("Student_Mental_Health.csv")
+st.title("Gender vs Mental Health")
 
 st.markdown("### 🎯 Objective 1")
 st.info("""
@@ -17,16 +18,13 @@ To analyze the relationship between gender and the type of mental health issues
 # 📊 SUMMARY METRICS BLOCK 📊
 # =================================================================
 
-# 1. Define the first dummy DataFrame used for Depression vs Gender
-data_depression = {
-    'Do you have Depression?': ['No', 'No', 'No', 'Yes', 'Yes', 'Yes', 'No', 'Yes'],
-    'Choose your gender': ['Female', 'Male', 'Female', 'Female', 'Male', 'Female', 'Female', 'Female']
-}
-mental_df_depression = pd.DataFrame(data_depression)
+# 1. Count tables computed from Student_Mental_Health.csv
+counts = survey_counts("student_mental_health")
+data_version = dataset_version("student_mental_health")
 
 # 2. Calculate Key Figures
-total_students = len(mental_df_depression)
-total_with_depression = (mental_df_depression['Do you have Depression?'] == 'Yes').sum()
+total_students = counts.total()
+total_with_depression = int(counts.counts(DEPRESSION)[1])
 percent_with_depression = (total_with_depression / total_students) * 100 if total_students > 0 else 0
 
 # 3. Display Metrics
@@ -57,15 +55,12 @@ st.markdown("---")
 # 📉 CHART 1: DEPRESSION VS GENDER
 # =================================================================
 
-# Use the dataframe defined for metrics
-mental_df = mental_df_depression 
-
-# Count the occurrences and convert to a DataFrame for Plotly
-depression_gender_counts = mental_df.groupby(['Do you have Depression?', 'Choose your gender']).size().reset_index(name='Count')
+# Count the occurrences as a long DataFrame for Plotly
+depression_gender_counts = counts.long(DEPRESSION, GENDER)
 depression_gender_counts.rename(columns={'Choose your gender': 'Gender'}, inplace=True) # Rename for cleaner legend
 
 # Create a grouped bar chart using Plotly Express
-fig = px.bar(
+fig = cached_figure(data_version, "depression_by_gender", None, lambda: px.bar(
     depression_gender_counts,
     x='Do you have Depression?', # The primary x-axis categories (No/Yes)
     y='Count',
@@ -75,56 +70,42 @@ fig = px.bar(
     color_discrete_map={'Female': 'blue', 'Male': 'orange'}, # Match colors to the original image
     title='Bar Chart : Count of Students with Depression by Gender',
     labels={'Do you have Depression?': 'Do you have Depression?', 'Count': 'Number of Students'}
-)
+))
 
 # 3. Display the Plotly chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 # =================================================================
 # 📉 CHART 2: ALL CONDITIONS STACKED BAR
 # =================================================================
 
-# Create dummy data that simulates the long-format data needed for the plot
-data = {
-    'Choose your gender': (['Female'] * 29 + ['Male'] * 6) * 3, # Simulating ~35 Female and ~18 Male overall
-    'Do you have Depression?': ['Yes'] * 29 + ['No'] * 6 + ['Yes'] * 29 + ['No'] * 6 + ['Yes'] * 29 + ['No'] * 6,
-    'Do you have Anxiety?': ['Yes'] * 24 + ['No'] * 5 + ['Yes'] * 9 + ['No'] * 0 + ['Yes'] * 29 + ['No'] * 6,
-    'Do you have Panic attack?': ['Yes'] * 25 + ['No'] * 4 + ['Yes'] * 8 + ['No'] * 1 + ['Yes'] * 29 + ['No'] * 6
-}
-# A proper mental_df would have many rows, this is just for demonstration structure
-mental_df = pd.DataFrame({
-    'Choose your gender': ['Female', 'Male', 'Female', 'Male', 'Female', 'Male', 'Female', 'Male'],
-    'Do you have Depression?': ['Yes', 'Yes', 'Yes', 'No', 'Yes', 'No', 'Yes', 'Yes'],
-    'Do you have Anxiety?': ['Yes', 'No', 'Yes', 'Yes', 'Yes', 'No', 'Yes', 'No'],
-    'Do you have Panic attack?': ['No', 'Yes', 'Yes', 'No', 'Yes', 'Yes', 'No', 'Yes']
-})
-
-
-# Melt the DataFrame to long format (same as your original logic)
-conditions_melted = mental_df.melt(
-    id_vars='Choose your gender',
-    value_vars=['Do you have Depression?', 'Do you have Anxiety?', 'Do you have Panic attack?'],
+# Number of 'Yes' answers per condition and gender (long format for Plotly)
+conditions_yes = counts.long(GENDER, *CONDITIONS)
+conditions_yes = conditions_yes.melt(
+    id_vars=['Choose your gender', 'Count'],
+    value_vars=CONDITIONS,
     var_name='Condition',
     value_name='Response'
 )
-
-# Filter for 'Yes' responses (same as your original logic)
-conditions_yes = conditions_melted[conditions_melted['Response'] == 'Yes']
+conditions_yes = conditions_yes[conditions_yes['Response'] == 'Yes'].groupby(
+    ['Condition', 'Choose your gender'], sort=False
+)['Count'].sum().reset_index()
 
 # Create the stacked bar chart using Plotly Express
-fig = px.bar(
+fig = cached_figure(data_version, "conditions_by_gender", None, lambda: px.bar(
     conditions_yes,
     x='Condition',
+    y='Count',
     color='Choose your gender', # This creates the stack segments and legend
     title='Stacked Bar Chart : Distribution of Mental Health Conditions by Gender',
-    labels={'Condition': 'Condition', 'Choose your gender': 'Gender', 'count': 'Number of Students with Condition'},
+    labels={'Condition': 'Condition', 'Choose your gender': 'Gender', 'Count': 'Number of Students with Condition'},
     # Manually map colors to match the image (blue for Female, orange for Male)
     color_discrete_map={'Female': 'blue', 'Male': 'orange'}
-)
+))
 
 # Display the Plotly chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 
@@ -132,53 +113,36 @@ st.plotly_chart(fig, use_container_width=True)
 # 📉 CHART 3: OVERALL ISSUES PIE CHART
 # =================================================================
 
-# Create dummy data that simulates students with and without mental health issues
-data = {
-    'Choose your gender': (['Female'] * 75 + ['Male'] * 25) + (['Female', 'Male'] * 50),
-    'Do you have Depression?': ['Yes'] * 100 + ['No'] * 100,
-    'Do you have Anxiety?': ['Yes'] * 50 + ['No'] * 50 + ['Yes'] * 50 + ['No'] * 50,
-    'Do you have Panic attack?': ['No'] * 200
-}
-mental_df = pd.DataFrame({
-    'Choose your gender': ['Female'] * 75 + ['Male'] * 25 + ['Female'] * 10 + ['Male'] * 10, # 120 total students
-    'Do you have Depression?': ['Yes'] * 75 + ['Yes'] * 25 + ['No'] * 20,
-    'Do you have Anxiety?': ['Yes'] * 75 + ['Yes'] * 25 + ['No'] * 20,
-    'Do you have Panic attack?': ['No'] * 120
-})
-
-# Identify students with at least one mental health issue (Your original logic)
-mental_health_issues = mental_df[
-    (mental_df['Do you have Depression?'] == 'Yes') |
-    (mental_df['Do you have Anxiety?'] == 'Yes') |
-    (mental_df['Do you have Panic attack?'] == 'Yes')
-].copy()
-
-# Count the occurrences of gender and prepare for Plotly
-# Convert the value_counts Series to a DataFrame
-gender_with_issues_counts = mental_health_issues['Choose your gender'].value_counts().reset_index()
+# Students with at least one mental health issue = everyone except No/No/No
+gender_condition_counts = counts.counts(GENDER, *CONDITIONS)
+issues_by_gender = gender_condition_counts.sum(axis=(1, 2, 3)) - gender_condition_counts[:, 0, 0, 0]
+
+gender_with_issues_counts = counts.long(GENDER)
+gender_with_issues_counts['Count'] = issues_by_gender
 gender_with_issues_counts.columns = ['Gender', 'Count'] # Rename columns
+female_issue_percent = 100 * issues_by_gender[0] / max(issues_by_gender.sum(), 1)
 
 # Create a pie chart using Plotly Express
-fig = px.pie(
+fig = cached_figure(data_version, "issues_by_gender", None, lambda: px.pie(
     gender_with_issues_counts,
     values='Count',
     names='Gender', # This provides the labels for the slices
     title='Pie Chart : Overall Proportion of Students with Mental Health Issues by Gender',
     # Match the colors of the original plot: Blue for Female, Orange for Male
     color_discrete_map={'Female': 'blue', 'Male': 'orange'}
-)
+))
 
 # Display the Plotly chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # --- Interpretation ---
 st.markdown("### 🧾 Interpretation")
 st.success(
-    """
+    f"""
 The three graphs collectively highlight a clear gender difference in the currency of mental health issues among students. 
 The bar and stacked bar charts show that female students consistently report higher numbers of depression, anxiety and panic attacks compared 
 to male students. While both genders experience these conditions, females influence across all categories, particularly in depression and anxiety. 
-The pie chart revealing that 75% of students with mental health issues are female while only 25% are male. These visualizations show that female 
+The pie chart revealing that {female_issue_percent:.0f}% of students with mental health issues are female while only {100 - female_issue_percent:.0f}% are male. These visualizations show that female 
 students are more affected by report mental health challenges than males, demonstrating a strong relationship between gender and the occurrence 
 of mental health issues among students.
     """
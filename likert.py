@@ -0,0 +1,200 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import survey_cube
+from datasets import DATASETS, dataset_version, load_dataset, per_version, rows_since, share_arrays
+from disk_cache import code_hash, disk_cache
+from figure_cache import filter_key
+from perf import phase
+from schema import Likert, column_type
+
+# ==================================================
+# LIKERT MATRIX
+# ==================================================
+# All 1-5 agreement statements of a survey (the columns its schema declares
+# Likert) are packed once into a single int8 matrix, one row per respondent
+# and 0 for a missing rating. Distributions, means, top-box shares and the
+# inter-item correlations for a filter state are then a few bincounts and
+# matrix products over that matrix, taken block by block so the temporary
+# arrays stay small however many respondents there are. Summaries are kept
+# per (dataset version, grouping, filter state), in memory and in the disk
+# cache, so a restarted process does not summarise the same states again.
+
+LEVELS = 5
+TOP_BOX = (4, 5)
+
+# Rows per block when summarising (bounds the float copies of the matrix)
+BLOCK_ROWS = 65_536
+
+# Filter states kept per process (override with SS2200_LIKERT_CACHE)
+SUMMARY_CACHE_SIZE = int(os.environ.get("SS2200_LIKERT_CACHE", 256))
+
+
+def likert_columns(dataset, columns):
+    """The columns of ``columns`` that ``dataset``'s schema rates 1-5."""
+    return [c for c in columns if isinstance(column_type(dataset.schema, c), Likert)]
+
+
+def item_label(column):
+    """Short English label of a statement column."""
+    return column.split(" / ")[0].replace("_", " ").strip()
+
+
+def _ratings(df, items):
+    # Missing or out-of-range ratings become 0
+    values = np.zeros((len(df), len(items)), dtype=np.int8)
+    for j, column in enumerate(items):
+        ratings = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        valid = (ratings >= 1) & (ratings <= LEVELS)
+        values[valid, j] = ratings[valid]
+    return values
+
+
+class LikertSummary:
+    """Per-group rating distributions, means and top-box shares, plus the
+    inter-item correlations, for one filter state.
+
+    Group 0 is "All" (every matching respondent, grouped or not).
+    """
+
+    def __init__(self, items, groups, distribution, correlation, respondents):
+        self.items = list(items)
+        self.groups = list(groups)
+        self.distribution = distribution  # (group, item, rating 1..LEVELS)
+        self.correlation = correlation  # (item, item), pairwise complete
+        self.respondents = respondents  # per group, answering any statement
+        self.answered = distribution.sum(axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.means = (distribution @ np.arange(1, LEVELS + 1)) / self.answered
+            top = distribution[:, :, [level - 1 for level in TOP_BOX]].sum(axis=2)
+            self.top_box = 100 * top / self.answered
+            self.shares = 100 * distribution / self.answered[:, :, None]
+
+    def table(self, group=0):
+        """Per-statement summary of one group as a DataFrame."""
+        return pd.DataFrame({
+            "Statement": [item_label(c) for c in self.items],
+            "Answers": self.answered[group],
+            "Mean": self.means[group].round(2),
+            "Top-box %": self.top_box[group].round(1),
+        })
+
+
+class LikertMatrix:
+    """int8 ratings matrix (respondent x statement) of a survey's Likert columns."""
+
+    def __init__(self, items, values):
+        self.items = list(items)
+        self.values = values
+        self.n_rows = len(values)
+
+    @classmethod
+    def from_frame(cls, dataset, df):
+        items = likert_columns(dataset, df.columns)
+        return cls(items, _ratings(df, items))
+
+    def shared(self, name):
+        """This matrix mapped from the shared store (shared_store.py)."""
+        self.values, = share_arrays(name, "likert", [self.values])
+        return self
+
+    def appended(self, rows):
+        """New matrix with ``rows`` (a frame of the same survey) added."""
+        return LikertMatrix(self.items, np.concatenate([self.values, _ratings(rows, self.items)]))
+
+    @phase("aggregate")
+    def summary(self, mask=None, group_codes=None, group_labels=()):
+        """LikertSummary of the rows in ``mask`` (bool array), split by
+        ``group_codes`` (ints into ``group_labels``, -1 for no answer)."""
+        n_items, n_groups = len(self.items), len(group_labels) + 1
+        if group_codes is None:
+            group_codes = np.full(self.n_rows, -1, dtype=np.int64)
+
+        # slot 0 collects respondents without a group, slot g + 1 group g
+        size = n_groups * n_items * (LEVELS + 1)
+        counts = np.zeros(size, dtype=np.int64)
+        respondents = np.zeros(n_groups, dtype=np.int64)
+        # Gram matrix of [x, x^2, answered] per row: every pairwise moment at once
+        moments = np.zeros((3 * n_items, 3 * n_items))
+        item_offset = np.arange(n_items) * (LEVELS + 1)
+
+        rows = np.arange(self.n_rows) if mask is None else np.flatnonzero(mask)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            values = self.values[block]
+            slot = group_codes[block].astype(np.int64) + 1
+            flat = (slot * n_items)[:, None] * (LEVELS + 1) + item_offset[None, :] + values
+            counts += np.bincount(flat.ravel(), minlength=size)
+            answered = (values > 0).any(axis=1)
+            respondents += np.bincount(slot[answered], minlength=n_groups)
+
+            # float32 is exact here: block sums stay below 25 * BLOCK_ROWS < 2**24
+            stacked = np.concatenate([values, values * values, values > 0], axis=1).astype(np.float32)
+            moments += stacked.T @ stacked
+
+        counts = counts.reshape(n_groups, n_items, LEVELS + 1)[:, :, 1:]
+        distribution = np.concatenate([counts.sum(axis=0, keepdims=True), counts[1:]])
+
+        x, xx, answered = (slice(k * n_items, (k + 1) * n_items) for k in range(3))
+        pairs = moments[answered, answered]  # rows answering both i and j
+        sum_x = moments[x, answered]  # sum of item i over rows where j is answered
+        sum_xx = moments[xx, answered]
+        sum_xy = moments[x, x]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = pairs * sum_xy - sum_x * sum_x.T
+            spread = pairs * sum_xx - sum_x ** 2
+            correlation = covariance / np.sqrt(spread * spread.T)
+        return LikertSummary(
+            self.items,
+            ["All"] + list(group_labels),
+            distribution,
+            correlation,
+            np.concatenate([[respondents.sum()], respondents[1:]]),
+        )
+
+
+def _refresh_matrix(matrix, since, name):
+    rows = rows_since(name, since)
+    if rows is None:
+        return None
+    with phase("index"):
+        return matrix.appended(rows).shared(name)
+
+
+@per_version(refresh=_refresh_matrix)
+def likert_matrix(name):
+    """LikertMatrix for dataset ``name``, rebuilt when its CSV changes."""
+    df = load_dataset(name)
+    with phase("index"):
+        return LikertMatrix.from_frame(DATASETS[name], df).shared(name)
+
+
+def likert_summary(name, group=None, where=None):
+    """LikertSummary of dataset ``name`` for one filter state, grouped by the
+    answers to ``group`` (None for just "All"); cached per filter state."""
+    return _summary(dataset_version(name), name, group, filter_key(where))
+
+
+@functools.lru_cache(maxsize=SUMMARY_CACHE_SIZE)
+def _summary(version, name, group, where):
+    key = disk_cache.key(
+        "likert_summary", name, group, where, DATASETS[name].schema_id,
+        disk_cache.source_digest(version), code_hash(_build_summary),
+    )
+    return disk_cache.get_or_build(key, lambda: _build_summary(name, group, where))
+
+
+def _build_summary(name, group, where):
+    cube = survey_cube(name)
+    matrix = likert_matrix(name)
+    mask = None
+    for column, values in where:
+        wanted = [i for i, label in enumerate(cube.labels[column]) if str(label) in values]
+        keep = np.isin(cube.codes[column], wanted)
+        mask = keep if mask is None else mask & keep
+    if group is None:
+        return matrix.summary(mask)
+    return matrix.summary(mask, cube.codes[group], cube.labels[group])
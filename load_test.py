@@ -0,0 +1,474 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+try:
+    import websockets
+except ImportError:  # only this tool needs it (pip install websockets)
+    websockets = None
+
+# ==================================================
+# CONCURRENT SESSION LOAD TEST
+# ==================================================
+# Launches app.py in one or more local Streamlit server processes and drives
+# N simulated browser sessions against them over Streamlit's own websocket
+# protocol: each session opens the app, then keeps switching pages and, on
+# a page with sidebar filters (the Project page), ticking answers in and
+# out, with random think times in between. A page switch is timed until
+# the page finished rendering, a filter change until its fragment reruns
+# finished. The report gives the throughput, latency percentiles per action
+# and page, and the CPU and memory of every server process, so a run shows
+# how many sessions one process sustains. Everything runs on this machine
+# (SS2200_OFFLINE=1): no browser and no network.
+#
+#   python load_test.py --sessions 20 --duration 60
+#   python load_test.py --sessions 50 100 200 --workers 2      # one run per count
+#   python load_test.py --sessions 50 --rows 100000 --json load.jsonl
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Seconds a server gets to come up, and one action to finish
+START_TIMEOUT = 120
+ACTION_TIMEOUT = 120
+
+# Seconds between CPU / memory samples of the server processes
+SAMPLE_SECONDS = 1.0
+
+# ScriptFinishedStatus: a run that stopped early is followed by the rerun
+FINISHED_EARLY_FOR_RERUN = 2
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile ``q`` (0-100) of ``values``, or None."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+# ==================================================
+# SERVER PROCESSES
+# ==================================================
+
+class Worker:
+    """One ``streamlit run app.py`` process, sampled from /proc."""
+
+    _ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def __init__(self, port, env, log_path):
+        self.port = port
+        self.env = env
+        self.log_path = log_path
+        self.process = None
+        self.cpu = []  # % of one core between samples
+        self.rss_mb = []
+        self._last = None  # (wall seconds, cpu seconds) of the previous sample
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self):
+        command = [
+            sys.executable, "-m", "streamlit", "run", str(APP_DIR / "app.py"),
+            "--server.headless", "true",
+            "--server.address", "127.0.0.1",
+            "--server.port", str(self.port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ]
+        with open(self.log_path, "wb") as log:
+            self.process = subprocess.Popen(
+                command, cwd=APP_DIR, env=self.env, stdout=log, stderr=subprocess.STDOUT
+            )
+
+    def wait_ready(self, timeout=START_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        health = f"http://127.0.0.1:{self.port}/_stcore/health"
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server on port {self.port} exited; see {self.log_path}")
+            try:
+                with urllib.request.urlopen(health, timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"server on port {self.port} not ready after {timeout} s")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def _read_proc(self):
+        # utime + stime (fields 14 and 15, after the parenthesised name) and VmRSS
+        pid = self.process.pid
+        with open(f"/proc/{pid}/stat") as handle:
+            fields = handle.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+        with open(f"/proc/{pid}/status") as handle:
+            rss_kb = next(int(line.split()[1]) for line in handle if line.startswith("VmRSS:"))
+        return cpu, rss_kb / 1024
+
+    def sample(self, keep=True):
+        """Record CPU use since the previous sample and the current RSS."""
+        try:
+            cpu, rss_mb = self._read_proc()
+        except (OSError, StopIteration, IndexError, ValueError):
+            return  # not Linux, or the process is gone
+        now = time.monotonic()
+        if keep:
+            if self._last is not None and now > self._last[0]:
+                self.cpu.append((cpu - self._last[1]) / (now - self._last[0]) * 100)
+            self.rss_mb.append(rss_mb)
+        self._last = (now, cpu)
+
+    def report(self):
+        return {
+            "port": self.port,
+            "cpu_mean_pct": sum(self.cpu) / len(self.cpu) if self.cpu else None,
+            "cpu_peak_pct": max(self.cpu, default=None),
+            "rss_start_mb": self.rss_mb[0] if self.rss_mb else None,
+            "rss_end_mb": self.rss_mb[-1] if self.rss_mb else None,
+            "rss_peak_mb": max(self.rss_mb, default=None),
+        }
+
+
+async def _monitor(workers, stop):
+    while not stop.is_set():
+        for worker in workers:
+            worker.sample()
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ==================================================
+# SIMULATED SESSIONS
+# ==================================================
+
+class Results:
+    """Latencies of every finished action, by (action, page)."""
+
+    def __init__(self):
+        self.latency_ms = {}
+        self.errors = {}
+        self.sessions = 0
+        self.elapsed = 0.0
+        self.client_cpu_s = 0.0
+
+    def record(self, action, page, ms):
+        self.latency_ms.setdefault((action, page), []).append(ms)
+
+    def error(self, reason):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+class Session:
+    """One browser tab: its widgets, the page it is on and what it selected."""
+
+    def __init__(self, url, rng, results, think):
+        self.url = url
+        self.rng = rng
+        self.results = results
+        self.think = think
+        self.ws = None
+        self.pages = {}  # url path -> page script hash
+        self.page = None
+        self.widgets = {}  # widget id -> (element type, proto) of the current page
+        self.values = {}  # widget id -> value this session set
+
+    async def _send(self, page_hash, widget_states=None):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = page_hash
+        if widget_states is not None:
+            msg.rerun_script.widget_states.CopyFrom(widget_states)
+        await self.ws.send(msg.SerializeToString())
+
+    async def _until_idle(self):
+        """Read until the run (and any fragment reruns it queued) finished.
+
+        Returns the number of exceptions the page showed.
+        """
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        finished, exceptions = None, 0
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in ("multiselect", "selectbox", "radio"):
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.id] = (element_type, widget)
+                elif element_type == "exception":
+                    exceptions += 1
+            elif kind == "navigation":
+                for page in msg.navigation.app_pages:
+                    self.pages[page.url_pathname or "home"] = page.page_script_hash
+            elif kind == "script_finished":
+                finished = msg.script_finished
+            elif kind == "session_status_changed" and not msg.session_status_changed.script_is_running:
+                # A run stopped early for a rerun is followed by that rerun
+                if finished is not None and finished != FINISHED_EARLY_FOR_RERUN:
+                    return exceptions
+
+    async def _timed(self, action, page, page_hash, widget_states=None):
+        start = time.perf_counter()
+        await self._send(page_hash, widget_states)
+        exceptions = await asyncio.wait_for(self._until_idle(), ACTION_TIMEOUT)
+        self.results.record(action, page, (time.perf_counter() - start) * 1000)
+        if exceptions:
+            self.results.error(f"exception on {page}")
+
+    def _widget_states(self):
+        from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+        states = WidgetStates()
+        for widget_id, (element_type, widget) in self.widgets.items():
+            state = states.widgets.add()
+            state.id = widget_id
+            value = self.values.get(widget_id)
+            if element_type == "multiselect":
+                if value is None:
+                    value = list(widget.raw_values) or [widget.options[i] for i in widget.default]
+                state.string_array_value.data.extend(value)
+            else:
+                if value is None:
+                    value = widget.raw_value or (widget.options[widget.default] if widget.options else "")
+                state.string_value = value
+        return states
+
+    def _filters(self):
+        return [wid for wid, (element_type, _) in self.widgets.items() if element_type == "multiselect"]
+
+    async def open(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        self.results.sessions += 1
+        await self._timed("open", "home", "")
+        self.page = "home"
+
+    async def switch_page(self):
+        page = self.rng.choice([p for p in self.pages if p != self.page] or list(self.pages))
+        self.widgets, self.values = {}, {}
+        await self._timed("page", page, self.pages[page])
+        self.page = page
+
+    async def toggle_filter(self):
+        """Tick one answer of one sidebar filter in or out (never all out)."""
+        widget_id = self.rng.choice(self._filters())
+        widget = self.widgets[widget_id][1]
+        selected = self._widget_states()  # current values of every widget
+        current = next(list(s.string_array_value.data) for s in selected.widgets if s.id == widget_id)
+        option = self.rng.choice(list(widget.options))
+        if option in current and len(current) > 1:
+            current.remove(option)
+        elif option not in current:
+            current.append(option)
+            current.sort(key=list(widget.options).index)
+        else:
+            return False
+        self.values[widget_id] = current
+        await self._timed("filter", self.page, self.pages[self.page], self._widget_states())
+        return True
+
+    async def run(self, until, filter_share):
+        try:
+            await self.open()
+            while time.monotonic() < until:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think) if self.think else 0)
+                if time.monotonic() >= until:
+                    break
+                if self._filters() and self.rng.random() < filter_share:
+                    if await self.toggle_filter():
+                        continue
+                await self.switch_page()
+        except asyncio.TimeoutError:
+            self.results.error("timeout")
+        except (OSError, websockets.exceptions.WebSocketException) as error:
+            self.results.error(type(error).__name__)
+        finally:
+            if self.ws is not None:
+                await self.ws.close()
+
+
+async def drive(workers, sessions, duration, ramp, think, filter_share, seed):
+    """Run ``sessions`` sessions spread over ``workers`` for ``duration`` seconds."""
+    results = Results()
+    stop = asyncio.Event()
+    for worker in workers:
+        worker.sample(keep=False)
+    monitor = asyncio.create_task(_monitor(workers, stop))
+    start, client_cpu = time.monotonic(), _cpu_seconds()
+    until = start + ramp + duration
+
+    async def launch(number):
+        # Arrivals spread over the ramp, so the servers are not hit all at once
+        await asyncio.sleep(ramp * number / max(sessions, 1))
+        rng = random.Random(seed * 100_003 + number)
+        worker = workers[number % len(workers)]
+        await Session(worker.url, rng, results, think).run(until, filter_share)
+
+    await asyncio.gather(*(launch(n) for n in range(sessions)))
+    stop.set()
+    await monitor
+    results.elapsed = time.monotonic() - start
+    results.client_cpu_s = _cpu_seconds() - client_cpu
+    return results
+
+
+# ==================================================
+# REPORT
+# ==================================================
+
+def summarise(results, workers, sessions, args):
+    actions = []
+    for (action, page), values in sorted(results.latency_ms.items()):
+        actions.append({
+            "action": action, "page": page, "count": len(values),
+            "p50_ms": _percentile(values, 50), "p90_ms": _percentile(values, 90),
+            "p99_ms": _percentile(values, 99), "max_ms": max(values),
+        })
+    every = [ms for values in results.latency_ms.values() for ms in values]
+    return {
+        "sessions": sessions,
+        "connected": results.sessions,
+        "workers": len(workers),
+        "rows": args.rows,
+        "think_s": args.think,
+        "elapsed_s": results.elapsed,
+        "actions": len(every),
+        "throughput_per_s": len(every) / results.elapsed if results.elapsed else None,
+        "p50_ms": _percentile(every, 50),
+        "p90_ms": _percentile(every, 90),
+        "p99_ms": _percentile(every, 99),
+        "errors": results.errors,
+        "by_action": actions,
+        "servers": [worker.report() for worker in workers],
+        # The load generator's own CPU: near 100 % means it, not the server, is the limit
+        "client_cpu_pct": results.client_cpu_s / results.elapsed * 100 if results.elapsed else None,
+    }
+
+
+def _fmt(value, digits=0):
+    return "-" if value is None else f"{value:,.{digits}f}"
+
+
+def print_summary(summary):
+    print(
+        f"\n{summary['sessions']} sessions on {summary['workers']} worker(s): "
+        f"{summary['actions']:,} actions in {summary['elapsed_s']:.0f} s = "
+        f"{_fmt(summary['throughput_per_s'], 1)}/s; latency p50 {_fmt(summary['p50_ms'])} "
+        f"p90 {_fmt(summary['p90_ms'])} p99 {_fmt(summary['p99_ms'])} ms"
+    )
+    print(f"  {'action':<8} {'page':<38} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for row in summary["by_action"]:
+        print(
+            f"  {row['action']:<8} {row['page']:<38} {row['count']:>6} {_fmt(row['p50_ms']):>8} "
+            f"{_fmt(row['p90_ms']):>8} {_fmt(row['p99_ms']):>8} {_fmt(row['max_ms']):>8}"
+        )
+    for server in summary["servers"]:
+        print(
+            f"  worker :{server['port']}  CPU mean {_fmt(server['cpu_mean_pct'])} % "
+            f"peak {_fmt(server['cpu_peak_pct'])} %  RSS {_fmt(server['rss_start_mb'])} -> "
+            f"{_fmt(server['rss_end_mb'])} MB (peak {_fmt(server['rss_peak_mb'])})"
+        )
+    print(f"  load generator CPU {_fmt(summary['client_cpu_pct'])} %")
+    for reason, count in sorted(summary["errors"].items()):
+        print(f"  ! {count} x {reason}")
+
+
+def server_env(args):
+    env = dict(os.environ, SS2200_OFFLINE="1")
+    if args.rows:
+        from bench_pages import prepare_data
+
+        data_dir = prepare_data(args.rows, args.work_dir)
+        env["SS2200_DATA_DIR"] = str(data_dir)
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test app.py with simulated concurrent sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10],
+                        help="concurrent sessions (several counts run one after another)")
+    parser.add_argument("--workers", type=int, default=1, help="server processes to spread sessions over")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load after the ramp-up")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds over which sessions arrive")
+    parser.add_argument("--think", type=float, default=3, help="mean think time between actions, seconds")
+    parser.add_argument("--filter-share", type=float, default=0.6,
+                        help="chance an action on a page with filters changes a filter")
+    parser.add_argument("--rows", type=int, help="run on synthetic CSVs of this many rows")
+    parser.add_argument("--work-dir", default=Path(tempfile.gettempdir()) / "ss2200-bench",
+                        help="where the synthetic CSVs are kept between runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="append the results to this JSON lines file")
+    args = parser.parse_args(argv)
+
+    if websockets is None:
+        parser.error("the websockets package is required (pip install websockets)")
+
+    env = server_env(args)
+    log_dir = Path(tempfile.mkdtemp(prefix="ss2200-load-"))
+    workers = [Worker(_free_port(), env, log_dir / f"worker-{i}.log") for i in range(args.workers)]
+    summaries = []
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.wait_ready()
+        print(f"{len(workers)} server(s) up (logs in {log_dir})")
+        for sessions in args.sessions:
+            for worker in workers:
+                worker.cpu, worker.rss_mb = [], []
+            results = asyncio.run(drive(
+                workers, sessions, args.duration, args.ramp, args.think, args.filter_share, args.seed
+            ))
+            summary = summarise(results, workers, sessions, args)
+            print_summary(summary)
+            summaries.append(summary)
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as handle:
+            for summary in summaries:
+                handle.write(json.dumps(summary) + "\n")
+    return 1 if any(summary["errors"] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
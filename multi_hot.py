@@ -0,0 +1,133 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex, popcount
+from datasets import load_dataset, per_version, rows_since
+from perf import phase
+
+# ==================================================
+# MULTI-SELECT ("SELECT ALL") ANSWERS
+# ==================================================
+# A "select all that apply" answer is stored as one string of the chosen
+# options ("Instagram;TikTok;WhatsApp"). Each distinct string is split once
+# and every row gets one bit per option it chose, packed per option like
+# the BitmapIndex answer bitmaps (and in the same row layout, so the two
+# combine with & and popcounts). Prevalence, co-usage and breakdowns by a
+# sidebar column are then bitwise ANDs and popcounts; nothing is searched
+# with str.contains.
+
+PLATFORMS = "Platforms you use most often (select all) / Platform yang paling kerap anda gunakan (pilih semua):"
+
+# Google Forms joins choices with ";"; "Other" answers list theirs with ","
+SEPARATORS = re.compile(r"[;,]")
+
+
+def split_options(values, separators=SEPARATORS):
+    """(options, members) for a multi-select column: ``members[i, k]`` is True
+    when row i chose ``options[k]``. Only the distinct answers are split."""
+    codes, answers = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    chosen = [
+        {part.strip() for part in separators.split(str(answer)) if part.strip()}
+        for answer in answers
+    ]
+    options = sorted(set().union(*chosen))
+    position = {option: k for k, option in enumerate(options)}
+    # One row per distinct answer, plus an all-False row for missing answers
+    lookup = np.zeros((len(answers) + 1, len(options)), dtype=bool)
+    for i, parts in enumerate(chosen):
+        lookup[i, [position[part] for part in parts]] = True
+    return options, lookup[codes]
+
+
+class MultiHotIndex(BitmapIndex):
+    """BitmapIndex of one multi-select column: a row has a bit set for every
+    option it chose, so selecting options means "chose any of them"."""
+
+    def __init__(self, column, options, members):
+        self.column = column
+        self.n_rows = len(members)
+        self.labels = {column: list(options)}
+        self._n_bytes = -(-self.n_rows // 64) * 8
+        self.bitmaps = {column: [self._pack(members[:, k]) for k in range(len(options))]}
+        self._all = self._pack(np.ones(self.n_rows, dtype=bool))
+
+    @classmethod
+    def from_values(cls, column, values):
+        options, members = split_options(values)
+        return cls(column, options, members)
+
+    @property
+    def options(self):
+        return self.labels[self.column]
+
+    def appended(self, values):
+        """New index with the answers ``values`` of new rows added."""
+        found, members = split_options(values)
+        options = sorted(set(self.options) | set(found))
+        if options != self.options:
+            grown = np.zeros((len(members), len(options)), dtype=bool)
+            grown[:, [options.index(option) for option in found]] = members
+            members = grown
+        n_rows = len(members)
+        index = super().appended(
+            {self.column: np.full(n_rows, -1)}, {self.column: options}, n_rows
+        )
+        start = self.n_rows
+        for k, bits in enumerate(index.bitmaps[self.column]):
+            self._set(bits, start + np.flatnonzero(members[:, k]))
+        return index
+
+    def _selected(self, selected):
+        if selected is None:
+            return self._all
+        if len(selected) != self._n_bytes:
+            raise ValueError("selected bitmap is over a different number of rows")
+        return selected
+
+    @phase("aggregate")
+    def prevalence(self, selected=None):
+        """Rows choosing each option, among the rows set in packed bitmap ``selected``."""
+        selected = self._selected(selected)
+        return np.array([popcount(selected & bits) for bits in self.bitmaps[self.column]])
+
+    @phase("aggregate")
+    def co_usage(self, selected=None):
+        """(option x option) rows choosing both; the diagonal is the prevalence."""
+        selected = self._selected(selected)
+        chosen = [selected & bits for bits in self.bitmaps[self.column]]
+        counts = np.zeros((len(chosen), len(chosen)), dtype=np.int64)
+        for i, a in enumerate(chosen):
+            counts[i, i] = popcount(a)
+            for j in range(i + 1, len(chosen)):
+                counts[i, j] = counts[j, i] = popcount(a & chosen[j])
+        return counts
+
+    @phase("aggregate")
+    def by(self, index, column, where=None):
+        """(answer of ``column`` x option) counts for the rows of BitmapIndex
+        ``index`` matching ``where``."""
+        selected = self._selected(index.select(where))
+        counts = np.zeros((len(index.labels[column]), len(self.options)), dtype=np.int64)
+        for i, group in enumerate(index.bitmaps[column]):
+            in_group = selected & group
+            for k, bits in enumerate(self.bitmaps[self.column]):
+                counts[i, k] = popcount(in_group & bits)
+        return counts
+
+
+def _refresh_multi_hot(index, since, name, column):
+    rows = rows_since(name, since)
+    if rows is None:
+        return None
+    with phase("index"):
+        return index.appended(rows[column]).shared(name, f"multi_hot:{column}")
+
+
+@per_version(refresh=_refresh_multi_hot)
+def multi_hot_index(name, column):
+    """MultiHotIndex of multi-select ``column`` of dataset ``name``."""
+    df = load_dataset(name)
+    with phase("index"):
+        return MultiHotIndex.from_values(column, df[column]).shared(name, f"multi_hot:{column}")
@@ -0,0 +1,237 @@
+import ast
+import contextlib
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+
+import perf
+
+# ==================================================
+# LAZY PAGE LOADING
+# ==================================================
+# app.py registers every page through lazy_page(), a plain file-based
+# st.Page (so st.switch_page, AppTest and Streamlit's file watcher see the
+# script), and runs the selected one with run_page(). Nothing heavy is
+# imported until a page is opened: run_page() then loads its top-level
+# imports (timed one by one) before Streamlit runs the script. preload()
+# warms pandas and Plotly Express in a background thread while the light
+# Home page renders, so the first chart page usually finds them imported.
+#
+# prewarm() then runs every page in the navigation menu once, bare (without
+# a session), in a small thread pool: the datasets, aggregates and figures
+# of each page's default view land in the process-wide caches before the
+# first visitor asks for them. prewarm_status() reports which are ready.
+#
+# Keep this module free of pandas/plotly imports: app.py imports it on
+# every cold start. With ?profile=1 each page run is also profiled phase by
+# phase (see perf.py).
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Modules warmed in the background at startup
+PRELOAD = ("pandas", "plotly.express")
+
+# Warn when a page spends longer than this importing modules on first open
+IMPORT_BUDGET_MS = float(os.environ.get("SS2200_IMPORT_BUDGET_MS", 1000))
+
+# Show the timing panel with SS2200_PAGE_TIMINGS=1 or ?timings=1
+SHOW_TIMINGS = os.environ.get("SS2200_PAGE_TIMINGS", "") not in ("", "0")
+
+# Pages pre-warmed at once at startup (SS2200_PREWARM_THREADS=0 switches it off)
+PREWARM_THREADS = int(os.environ.get("SS2200_PREWARM_THREADS", 2))
+
+logger = logging.getLogger(__name__)
+
+# script -> recent runs as {"imports": {module: ms}, "exec_ms": ms}
+PAGE_TIMINGS = {}
+SCRIPTS = {}  # page title -> script, for pages made by lazy_page()
+PAGES = []  # scripts of the pages in the navigation menu, in order
+# script -> {"state": "waiting" | "warming" | "ready" | "failed", "ms": ...}
+PREWARM = {}
+_code_cache = {}  # script path -> (mtime, compiled code, top-level imports)
+
+
+def _compile(path):
+    mtime = path.stat().st_mtime_ns
+    cached = _code_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        source = path.read_text(encoding="utf-8")
+        tree = ast.parse(source, str(path))
+        imports = []
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                imports += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                imports.append(node.module)
+        cached = (mtime, compile(tree, str(path), "exec"), list(dict.fromkeys(imports)))
+        _code_cache[path] = cached
+    return cached[1], cached[2]
+
+
+def _import_timed(modules):
+    timings = {}
+    for module in modules:
+        if module in sys.modules:
+            continue
+        start = time.perf_counter()
+        importlib.import_module(module)
+        timings[module] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def lazy_page(script, *, title, icon, default=False):
+    """File-based st.Page for ``script``; open it through run_page()."""
+    SCRIPTS[title] = script
+    return st.Page(script, title=title, icon=icon, default=default)
+
+
+def navigation(pages, **kwargs):
+    """st.navigation over ``pages``, remembering their scripts for prewarm()."""
+    groups = pages.values() if isinstance(pages, dict) else [pages]
+    for page in (page for group in groups for page in group):
+        script = SCRIPTS.get(page.title)
+        if script is not None and script not in PAGES:
+            PAGES.append(script)
+    return st.navigation(pages, **kwargs)
+
+
+def _pinned_versions():
+    # A page that reads the datasets sees one version of each for the whole
+    # run (datasets.pinned_run); its own imports have loaded datasets by now,
+    # while other pages may find it still being imported by preload()
+    pinned_run = getattr(sys.modules.get("datasets"), "pinned_run", None)
+    return pinned_run() if pinned_run is not None else contextlib.nullcontext()
+
+
+def run_page(page):
+    """Run the page st.navigation selected, timing its imports and its run."""
+    script = SCRIPTS.get(page.title)
+    if script is None:
+        page.run()
+        return
+    _, imports = _compile(APP_DIR / script)
+    import_ms = _import_timed(imports)
+    if sum(import_ms.values()) > IMPORT_BUDGET_MS:
+        logger.warning(
+            "%s spent %.0f ms importing %s",
+            script, sum(import_ms.values()), ", ".join(import_ms),
+        )
+    with perf.running():
+        if perf.profiling_requested():
+            perf.start_run(script)
+        start = time.perf_counter()
+        try:
+            with _pinned_versions():
+                page.run()
+        finally:
+            runs = PAGE_TIMINGS.setdefault(script, deque(maxlen=20))
+            runs.append({"imports": import_ms, "exec_ms": (time.perf_counter() - start) * 1000})
+            # Phase profile of this rerun (?profile=1 or SS2200_PROFILE=1)
+            perf.show_profile(perf.finish_run())
+
+
+_preload_started = threading.Event()
+
+
+def preload(modules=PRELOAD):
+    """Import ``modules`` in a background thread (once per process)."""
+    if _preload_started.is_set():
+        return
+    _preload_started.set()
+
+    def warm():
+        for module, ms in _import_timed(modules).items():
+            logger.info("Preloaded %s in %.0f ms", module, ms)
+
+    threading.Thread(target=warm, name="page-preload", daemon=True).start()
+
+
+_PREWARM_THREAD = "page-prewarm"
+
+
+class _BareRunFilter(logging.Filter):
+    # Pre-warm runs have no session, which Streamlit warns about on every call
+    def filter(self, record):
+        return not record.threadName.startswith(_PREWARM_THREAD)
+
+
+def _prewarm_page(script):
+    PREWARM[script] = {"state": "warming"}
+    start = time.perf_counter()
+    try:
+        code, imports = _compile(APP_DIR / script)
+        _import_timed(imports)
+        with perf.running(), _pinned_versions():
+            exec(code, {"__name__": "__main__", "__file__": str(APP_DIR / script)})
+    except Exception as error:
+        PREWARM[script] = {"state": "failed", "error": repr(error)}
+        logger.warning("Pre-warming %s failed: %r", script, error)
+        return
+    ms = (time.perf_counter() - start) * 1000
+    PREWARM[script] = {"state": "ready", "ms": ms}
+    logger.info("Pre-warmed %s in %.0f ms", script, ms)
+
+
+_prewarm_started = threading.Event()
+
+
+def prewarm(scripts=None, threads=PREWARM_THREADS):
+    """Run every page of the navigation menu once in the background (once per process)."""
+    if threads <= 0 or _prewarm_started.is_set():
+        return
+    _prewarm_started.set()
+    scripts = list(PAGES if scripts is None else scripts)
+    for script in scripts:
+        PREWARM[script] = {"state": "waiting"}
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        _BareRunFilter()
+    )
+
+    def warm():
+        with ThreadPoolExecutor(threads, thread_name_prefix=_PREWARM_THREAD) as pool:
+            list(pool.map(_prewarm_page, scripts))
+        logger.info("Pre-warm finished: %s", prewarm_status())
+
+    threading.Thread(target=warm, name=_PREWARM_THREAD, daemon=True).start()
+
+
+def prewarm_status():
+    """Pages ready, failed and still to do, e.g. {"ready": 5, "failed": 0, "pending": 2}."""
+    states = [entry["state"] for entry in PREWARM.values()]
+    return {
+        "ready": states.count("ready"),
+        "failed": states.count("failed"),
+        "pending": len(states) - states.count("ready") - states.count("failed"),
+    }
+
+
+def show_page_timings():
+    """Sidebar panel with per-page import and run times for this process."""
+    if not (SHOW_TIMINGS or st.query_params.get("timings") == "1"):
+        return
+    with st.sidebar.expander("⏱️ Page load times"):
+        if PREWARM:
+            status = prewarm_status()
+            st.caption(
+                f"Pre-warm: {status['ready']}/{len(PREWARM)} pages ready"
+                + (f", {status['failed']} failed" if status["failed"] else "")
+            )
+        for script, runs in PAGE_TIMINGS.items():
+            first, last = runs[0], runs[-1]
+            import_ms = sum(first["imports"].values())
+            flag = " ⚠️" if import_ms > IMPORT_BUDGET_MS else ""
+            st.markdown(
+                f"**{script}**{flag}  \n"
+                f"first open: {import_ms:.0f} ms imports + {first['exec_ms']:.0f} ms run  \n"
+                f"last run: {last['exec_ms']:.0f} ms ({len(runs)} runs)"
+            )
+            if first["imports"]:
+                st.caption(", ".join(f"{m} {ms:.0f} ms" for m, ms in first["imports"].items()))
@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# ==================================================
+# PHASE TIMINGS AND PROFILING
+# ==================================================
+# The data layer marks its hot paths with ``phase("load")`` and friends, as a
+# ``with`` block or a decorator. While nothing is collecting (the default) a
+# phase costs one flag check. Two things can collect:
+#
+# - the benchmark harness calls enable() and reads the totals with
+#   take_timings() after every page run;
+# - the profiling overlay (?profile=1 or SS2200_PROFILE=1) records every
+#   rerun of the page with wall time and tracemalloc deltas per phase, shows
+#   them in the sidebar and appends them to SS2200_PROFILE_LOG as JSON lines.
+#   tracemalloc runs only while a profiled run is in progress. Its counts
+#   are process-wide, so a run that overlapped other page runs is flagged:
+#   its memory figures include theirs.
+#
+# Pages show charts through plotly_chart() below, which times the
+# st.plotly_chart call under "render".
+#
+# Nested phases are timed exclusively, so a figure build that aggregates
+# counts books that time under "aggregate", not "figure". Charts a profiled
+# run builds on the task pool (task_pool.py) are listed task by task.
+
+PHASES = ("parse", "load", "index", "filter", "aggregate", "figure", "render")
+
+# Profile every rerun of every session (otherwise only with ?profile=1)
+PROFILE = os.environ.get("SS2200_PROFILE", "") not in ("", "0")
+
+# JSON lines file profiled reruns are appended to
+PROFILE_LOG = os.environ.get("SS2200_PROFILE_LOG")
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_timings = []  # (phase, milliseconds) while enabled
+
+_active_runs = 0  # page script runs in progress (see running())
+_runs_started = 0  # page script runs started so far
+_profiled_runs = 0  # profiled runs in progress; tracemalloc runs while > 0
+_tracing = False  # tracemalloc was started here, so it is stopped here
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+def _traced_bytes():
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block under ``name`` when something is collecting."""
+    run = getattr(_local, "run", None)
+    if not _enabled and run is None:
+        yield
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    frame = [0.0, 0]  # seconds and bytes spent in nested phases
+    stack.append(frame)
+    start, start_bytes = time.perf_counter(), _traced_bytes()
+    try:
+        yield
+    finally:
+        elapsed, grown = time.perf_counter() - start, _traced_bytes() - start_bytes
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+            stack[-1][1] += grown
+        own_ms = (elapsed - frame[0]) * 1000
+        if _enabled:
+            with _lock:
+                _timings.append((name, own_ms))
+        if run is not None:
+            totals = run["phases"].setdefault(name, {"calls": 0, "ms": 0.0, "mem_kb": 0.0})
+            totals["calls"] += 1
+            totals["ms"] += own_ms
+            totals["mem_kb"] += (grown - frame[1]) / 1024
+
+
+def take_timings():
+    """Total milliseconds per phase since the last call, then reset."""
+    with _lock:
+        timings = list(_timings)
+        _timings.clear()
+    totals = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return totals
+
+
+def plotly_chart(figure, **kwargs):
+    """st.plotly_chart, timed under the "render" phase."""
+    with phase("render"):
+        return st.plotly_chart(figure, **kwargs)
+
+
+# ==================================================
+# PER-RERUN PROFILES
+# ==================================================
+
+def profiling_requested():
+    return PROFILE or st.query_params.get("profile") == "1"
+
+
+@contextmanager
+def running():
+    """Count the enclosed page script run (page_loader wraps every one)."""
+    global _active_runs, _runs_started
+    with _lock:
+        _active_runs += 1
+        _runs_started += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _active_runs -= 1
+
+
+def start_run(page):
+    """Start recording the phases of this script run of ``page``."""
+    global _profiled_runs, _tracing
+    with _lock:
+        _profiled_runs += 1
+        if not tracemalloc.is_tracing():
+            # Tracing slows every session down: only while a profiled run is on
+            tracemalloc.start()
+            _tracing = True
+        tracemalloc.reset_peak()
+        overlapped, started = _active_runs > 1, _runs_started
+    _local.run = {
+        "page": page,
+        "started": time.time(),
+        "phases": {},
+        "_start": time.perf_counter(),
+        "_start_bytes": _traced_bytes(),
+        "_overlapped": overlapped,
+        "_runs_started": started,
+    }
+
+
+def is_profiling():
+    """True while this thread's script run is being profiled."""
+    return getattr(_local, "run", None) is not None
+
+
+@contextmanager
+def collecting(phases):
+    """Add the phases of the enclosed block to the dict ``phases``.
+
+    For work a profiled run hands to another thread (see task_pool.py).
+    """
+    previous = getattr(_local, "run", None)
+    _local.run = {"phases": phases}
+    try:
+        yield phases
+    finally:
+        _local.run = previous
+
+
+def record_task(entry):
+    """Add the timings of one page task to this thread's profiled run."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.setdefault("tasks", []).append(entry)
+
+
+def finish_run():
+    """Stop recording; return the finished profile (None when not profiling)."""
+    global _profiled_runs, _tracing
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+    _local.run = None
+    total_ms = (time.perf_counter() - run.pop("_start")) * 1000
+    start_bytes = run.pop("_start_bytes")
+    run["total_ms"] = total_ms
+    run["other_ms"] = total_ms - sum(p["ms"] for p in run["phases"].values())
+    with _lock:
+        run["mem_kb"] = (_traced_bytes() - start_bytes) / 1024
+        run["peak_kb"] = (tracemalloc.get_traced_memory()[1] - start_bytes) / 1024
+        # Another run started or was running: the memory counts include its own
+        run["overlapped"] = run.pop("_overlapped") or _runs_started != run.pop("_runs_started")
+        _profiled_runs -= 1
+        if _profiled_runs == 0 and _tracing:
+            tracemalloc.stop()
+            _tracing = False
+
+    if PROFILE_LOG:
+        with _lock, open(PROFILE_LOG, "a", encoding="utf-8") as log:
+            log.write(json.dumps(run) + "\n")
+    return run
+
+
+def show_profile(run, keep=50):
+    """Sidebar panel for ``run`` plus a JSON lines download of this session's runs."""
+    if run is None:
+        return
+    runs = st.session_state.setdefault("profile_runs", deque(maxlen=keep))
+    runs.append(run)
+
+    with st.sidebar.expander("🔬 Profile", expanded=True):
+        st.markdown(
+            f"**{run['page']}**: {run['total_ms']:.0f} ms  \n"
+            f"memory {run['mem_kb']:+,.0f} KB, peak {run['peak_kb']:+,.0f} KB"
+        )
+        if run["overlapped"]:
+            st.caption("Other page runs overlapped this one; memory includes theirs.")
+        rows = [
+            {"phase": name, "calls": p["calls"], "ms": round(p["ms"], 1), "mem KB": round(p["mem_kb"], 1)}
+            for name, p in sorted(run["phases"].items(), key=lambda item: -item[1]["ms"])
+        ]
+        rows.append({"phase": "other", "calls": None, "ms": round(run["other_ms"], 1), "mem KB": None})
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        if run.get("tasks"):
+            # Charts built on the task pool: queued, running and waited for
+            st.dataframe(
+                [
+                    {
+                        "task": t["task"], "thread": t["thread"], "queued ms": round(t["queued_ms"], 1),
+                        "run ms": round(t["run_ms"], 1), "waited ms": round(t["waited_ms"], 1),
+                    }
+                    for t in run["tasks"]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+        st.download_button(
+            "Download runs (JSON lines)",
+            data="\n".join(json.dumps(r) for r in runs) + "\n",
+            file_name="profile.jsonl",
+            mime="application/jsonl",
+        )
@@ -0,0 +1,141 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cube import survey_cube
+from datasets import per_version
+from likert import BLOCK_ROWS, likert_matrix
+from perf import phase
+from schema import column_type
+
+# ==================================================
+# PLO SCORES
+# ==================================================
+# Programme Learning Outcome scores from the arts faculty evaluation
+# ratings. Each outcome lists the rating columns that evidence it (column
+# names or schema.pattern() keys, as in a dataset schema). A respondent's
+# score for an outcome is the mean of their answered ratings among those
+# columns; the outcome score is the mean over respondents. The mapping
+# becomes one (statement x outcome) weight matrix, so every respondent's
+# scores are a single product with the Likert matrix and each breakdown is
+# a bincount over those scores.
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """One PLO: its code, a short name, and the rating columns behind it."""
+    code: str
+    name: str
+    columns: tuple
+
+    def __post_init__(self):
+        object.__setattr__(self, "columns", tuple(self.columns))
+
+
+def rated(statement):
+    """Key matching the ``Area of Evaluation``/``Item`` column of ``statement``."""
+    return re.compile(r"(Area of Evaluation|Item) \[\s*" + re.escape(statement) + r".*", re.DOTALL)
+
+
+ARTS_PLOS = (
+    Outcome("PLO 2", "Cognitive Skill", [
+        rated("Diverse methods are used to achieve learning objectives"),
+        rated("Assessment system meets the objectives of the course"),
+        rated("The questions of examinations reflect the content of the course"),
+        rated("Courses in the curriculum from lower level to higher are properly arranged"),
+        rated("Mechanism exists for engaging the students in research and development"),
+        rated("Research findings in the form of theses"),
+    ]),
+    Outcome("PLO 3", "Digital Skill", [
+        rated("Modern devices are used to improve teaching-learning process"),
+        rated("Internet facilities with sufficient speed are available"),
+        rated("Website is informative and updated properly"),
+        rated("Laboratories facilities are suitable"),
+        rated("The library has adequate up-to-date reading and reference materials"),
+    ]),
+    Outcome("PLO 4", "Interpersonal Skill", [
+        rated("Teaching-learning is interactive and supportive"),
+        rated("Students are encouraged to involve in co- curricular"),
+        rated("Mentoring is done to take care of the students"),
+        rated("There is an arrangement to provide guidance and counseling"),
+        rated("There are opportunities to get involve with community services"),
+        rated("Supporting staff are adequate and co-operative"),
+    ]),
+    Outcome("PLO 5", "Communication Skill", [
+        rated("Department provides comprehensive guidelines to the students"),
+        rated("Lesson plans/course outlines are provided in advance"),
+        rated("All about assessment system are duly communicated"),
+        rated("Assessment feedback is provided to the students immediately"),
+        rated("Student feedback process is in practice"),
+        rated("Students\x92 opinion regarding academic and extra-academic matters"),
+    ]),
+)
+
+
+def outcome_weights(items, outcomes):
+    """(statement x outcome) 0/1 matrix: which statements count for which outcome."""
+    weights = np.zeros((len(items), len(outcomes)), dtype=np.float32)
+    for k, outcome in enumerate(outcomes):
+        mapping = {key: True for key in outcome.columns}
+        for j, item in enumerate(items):
+            if column_type(mapping, item):
+                weights[j, k] = 1
+        if not weights[:, k].any():
+            raise ValueError(f"{outcome.code}: none of its columns are in the survey")
+    return weights
+
+
+class OutcomeScores:
+    """Per-respondent outcome scores with overall and per-group means."""
+
+    def __init__(self, outcomes, scores, cube):
+        self.outcomes = list(outcomes)
+        self.scores = scores  # (respondent, outcome), NaN where nothing was rated
+        self._cube = cube
+
+    def overall(self):
+        """Mean score per outcome."""
+        with np.errstate(invalid="ignore"):
+            return np.nanmean(self.scores, axis=0)
+
+    @phase("aggregate")
+    def by(self, column):
+        """Mean score per answer of ``column`` (rows) and outcome (columns),
+        with the number of respondents scored in each group."""
+        codes = self._cube.codes[column].astype(np.int64)
+        labels = self._cube.labels[column]
+        known = codes >= 0
+        scored = ~np.isnan(self.scores) & known[:, None]
+        values = np.where(scored, self.scores, 0)
+        means = np.empty((len(labels), len(self.outcomes)))
+        for k in range(len(self.outcomes)):
+            totals = np.bincount(codes[known], weights=values[known, k], minlength=len(labels))
+            counts = np.bincount(codes[known], weights=scored[known, k], minlength=len(labels))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means[:, k] = totals / counts
+        table = pd.DataFrame(means, index=pd.Index(labels, name=column),
+                             columns=[o.code for o in self.outcomes])
+        table["Respondents"] = np.bincount(
+            codes[known], weights=scored[known].any(axis=1), minlength=len(labels)
+        ).astype(np.int64)
+        return table[table["Respondents"] > 0]
+
+
+@per_version
+def outcome_scores(name, outcomes=ARTS_PLOS):
+    """OutcomeScores of dataset ``name``, rebuilt when its CSV changes."""
+    matrix = likert_matrix(name)
+    cube = survey_cube(name)
+    with phase("aggregate"):
+        weights = outcome_weights(matrix.items, outcomes)
+        scores = np.empty((matrix.n_rows, len(outcomes)), dtype=np.float32)
+        for start in range(0, matrix.n_rows, BLOCK_ROWS):
+            values = matrix.values[start:start + BLOCK_ROWS]
+            # Ratings are at most 5, so these float32 sums are exact
+            totals = values.astype(np.float32) @ weights
+            answered = (values > 0).astype(np.float32) @ weights
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores[start:start + BLOCK_ROWS] = totals / answered
+    return OutcomeScores(outcomes, scores, cube)
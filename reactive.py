@@ -0,0 +1,166 @@
+import functools
+import inspect
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import datasets
+import task_pool
+
+# ==================================================
+# REACTIVE PAGE SECTIONS
+# ==================================================
+# Each chart (or group of metrics) of a page is a keyed Streamlit fragment
+# that declares the inputs it reads: sidebar filters by column name, plus
+# any widget of its own. Filter values live in st.session_state, so a
+# section always reads the current ones. When a sidebar filter changes, its
+# callback reruns only the sections that read that column (st.rerun with
+# their fragment keys); the rest of the page is neither recomputed nor sent
+# again. A widget inside a section reruns just that section, as fragments
+# do. With a Streamlit that has no keyed fragments, every change reruns the
+# whole page as before. Without a session (the startup pre-warm runs pages
+# bare) sections are plain calls and the filters keep their defaults.
+#
+# A section's slow part (aggregating and building its figure) can be a task
+# of the page instead: a function of its arguments alone. The page starts
+# every task on the build pool (task_pool.py) once it knows the filters, and
+# each section takes its result in order, so the charts are built side by
+# side. The page lists the tasks to start (Page.plan); when a filter change
+# reruns sections on their own, the callback starts the tasks of those
+# sections the same way before they rerun. A section rerun by its own
+# widget has nothing started and runs its task inline.
+#
+# Sections and tasks read the datasets at the versions the page run that
+# drew them used (datasets.pinned_run), like the cube and index objects the
+# page built then. Once the watcher has published a newer version, a
+# section rerun reruns the whole page instead.
+
+KEYED = "key" in inspect.signature(st.fragment).parameters
+
+
+class Page:
+    """Sections and sidebar filters of one page, with what each section reads."""
+
+    def __init__(self, name):
+        self.name = name
+        self.reads = {}  # fragment key -> input names
+        self.defaults = {}  # filter column -> answers selected at first
+        self.tasks = {}  # task name -> function
+        self.section_tasks = {}  # fragment key -> names of the tasks it takes
+        self._plan = None  # function -> [(task name, *args)], see plan()
+        self._started = {}  # (task name, repr of args) -> task_pool.Task
+        # Dataset versions of the page run that created the page (None outside one)
+        self.versions = datasets.run_versions()
+
+    def section(self, key, reads=(), tasks=None):
+        """Decorator making a function a section that reruns when ``reads`` change.
+
+        ``tasks`` names the page tasks it takes (by default the task named
+        like the section, if any).
+        """
+        tasks = (key,) if tasks is None else tuple(tasks)
+        key = f"{self.name}:{key}"
+        self.reads[key] = frozenset(reads)
+        self.section_tasks[key] = tasks
+
+        def wrap(fn):
+            @functools.wraps(fn)
+            def pinned(*args, **kwargs):
+                if self.versions is not None and datasets.run_versions() is None:
+                    # A section rerun on its own, after the page run
+                    if datasets.outdated(self.versions):
+                        st.rerun()
+                return self._pinned(fn, *args, **kwargs)
+
+            fragment = st.fragment(pinned, key=key) if KEYED else st.fragment(pinned)
+
+            @functools.wraps(fn)
+            def section(*args, **kwargs):
+                if get_script_run_ctx(suppress_warning=True) is None:
+                    return fn(*args, **kwargs)
+                return fragment(*args, **kwargs)
+
+            return section
+
+        return wrap
+
+    def _key(self, column):
+        return f"{self.name}:filter:{column}"
+
+    def filter(self, column, label, options):
+        """Sidebar multiselect for ``column`` (every answer selected at first)."""
+        self.defaults[column] = list(options)
+        return st.sidebar.multiselect(
+            label, options, options,
+            key=self._key(column),
+            on_change=self._changed,
+            args=(column,),
+        )
+
+    def filters(self, columns):
+        """Current {column: selected answers} of the sidebar filters."""
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return {column: self.defaults[column] for column in columns}
+        return {column: st.session_state[self._key(column)] for column in columns}
+
+    def widget_key(self, key):
+        """Session-state key for a widget of one of the page's sections."""
+        return f"{self.name}:widget:{key}"
+
+    def value(self, key, default):
+        """Current value of the widget at ``widget_key(key)``, or ``default``
+        before it is first drawn (and without a session)."""
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return default
+        return st.session_state.get(self.widget_key(key), default)
+
+    def task(self, name):
+        """Decorator making a function a task; it must not call Streamlit."""
+
+        def wrap(fn):
+            self.tasks[name] = fn
+            return fn
+
+        return wrap
+
+    def _pinned(self, fn, *args, **kwargs):
+        with datasets.pinned_run(self.versions):
+            return fn(*args, **kwargs)
+
+    def plan(self, fn):
+        """Decorator for the function listing the tasks to start, as
+        ``(task name, *args)`` in page order, from the current inputs."""
+        self._plan = fn
+        return fn
+
+    def start_tasks(self, sections=None):
+        """Start the planned tasks (only those of ``sections`` if given)."""
+        if self._plan is None:
+            return
+        wanted = None
+        if sections is not None:
+            wanted = {name for key in sections for name in self.section_tasks[key]}
+        for name, *args in self._plan():
+            if wanted is None or name in wanted:
+                self.start(name, *args)
+
+    def start(self, name, *args):
+        """Start task ``name`` with ``args`` ahead of the section that needs it."""
+        task = task_pool.submit(name, self._pinned, self.tasks[name], *args)
+        if task is not None:
+            self._started[(name, repr(args))] = task
+
+    def result(self, name, *args):
+        """Result of task ``name`` for ``args``: the started one, else run now."""
+        task = self._started.pop((name, repr(args)), None)
+        if task is None:
+            return task_pool.run_inline(name, self._pinned, self.tasks[name], *args)
+        return task.result()
+
+    def _changed(self, column):
+        readers = [key for key, reads in self.reads.items() if column in reads]
+        if KEYED and readers:
+            # Unless the whole page is about to rerun on a newer dataset
+            if self.versions is None or not datasets.outdated(self.versions):
+                self.start_tasks(readers)
+            st.rerun(readers)
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+from data_store import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: processes just don't coordinate refreshes
+    fcntl = None
+
+# ==================================================
+# OFFLINE-FIRST REMOTE DATASETS
+# ==================================================
+# Remote CSVs are mirrored into a local folder shared by every server
+# process. A mirrored copy is served straight from disk and only revalidated
+# (ETag / If-Modified-Since) once it is older than REVALIDATE_SECONDS. When the
+# network is down the last good copy keeps being served.
+
+# Local mirror folder (override with SS2200_MIRROR_DIR)
+MIRROR_DIR = Path(os.environ.get("SS2200_MIRROR_DIR", DATA_DIR / ".mirror"))
+
+# Seconds a mirrored copy is trusted before asking the server again
+REVALIDATE_SECONDS = float(os.environ.get("SS2200_REVALIDATE_SECONDS", 300))
+
+# Set SS2200_OFFLINE=1 to never touch the network
+OFFLINE = os.environ.get("SS2200_OFFLINE", "") not in ("", "0")
+
+TIMEOUT_SECONDS = 10
+
+
+class FetchError(OSError):
+    """Raised when a URL cannot be downloaded and no mirrored copy exists."""
+
+
+def mirror_path(url):
+    """Local file that holds the mirrored copy of ``url``."""
+    name = os.path.basename(urlparse(url).path) or "index"
+    digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+    return MIRROR_DIR / f"{digest}-{name}"
+
+
+def _meta_path(path):
+    return path.with_name(path.name + ".json")
+
+
+def _read_meta(path):
+    try:
+        return json.loads(_meta_path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path, meta):
+    tmp = _meta_path(path).with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, _meta_path(path))
+
+
+_thread_lock = threading.Lock()
+
+
+@contextmanager
+def _refresh_lock(path):
+    """Only one thread of one process refreshes a given mirror at a time."""
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path.with_name(path.name + ".lock"), "w") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _is_fresh(path, meta, max_age):
+    return path.exists() and time.time() - meta.get("checked_at", 0) < max_age
+
+
+def fetch(url, max_age=None, offline=None, timeout=TIMEOUT_SECONDS):
+    """Return a local path holding the current contents of ``url``.
+
+    The mirrored copy is used as-is while it is younger than ``max_age``
+    seconds; after that the server is asked whether it changed. Network
+    failures fall back to the mirrored copy and only raise FetchError when
+    there is none.
+    """
+    max_age = REVALIDATE_SECONDS if max_age is None else max_age
+    offline = OFFLINE if offline is None else offline
+    path = mirror_path(url)
+
+    if _is_fresh(path, _read_meta(path), max_age) or (offline and path.exists()):
+        return path
+    if offline:
+        raise FetchError(f"{url} is not mirrored and offline mode is on")
+
+    MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+    with _refresh_lock(path):
+        # Another worker may have refreshed it while we waited for the lock
+        meta = _read_meta(path)
+        if _is_fresh(path, meta, max_age):
+            return path
+
+        request = urllib.request.Request(url)
+        if path.exists():
+            if meta.get("etag"):
+                request.add_header("If-None-Match", meta["etag"])
+            if meta.get("last_modified"):
+                request.add_header("If-Modified-Since", meta["last_modified"])
+
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                tmp = path.with_suffix(f".{os.getpid()}.download")
+                with open(tmp, "wb") as out:
+                    shutil.copyfileobj(response, out)
+                os.replace(tmp, path)
+                meta = {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+        except (urllib.error.URLError, OSError) as error:
+            not_modified = isinstance(error, urllib.error.HTTPError) and error.code == 304
+            if not path.exists():
+                raise FetchError(f"Could not download {url}: {error}") from error
+            if not_modified:
+                meta.pop("error", None)
+            else:
+                # Keep serving the last good copy and back off until the next check
+                meta["error"] = str(error)
+
+        meta["checked_at"] = time.time()
+        _write_meta(path, meta)
+    return path
+
+
+def seed(url, source):
+    """Use the local file ``source`` as the mirror of ``url`` if none exists yet.
+
+    The seeded copy counts as stale, so the next online fetch revalidates it.
+    """
+    path = mirror_path(url)
+    if path.exists():
+        return path
+    MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.seed")
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, path)
+    # No validators: the first online check downloads the real file
+    _write_meta(path, {"url": url, "etag": None, "last_modified": None, "checked_at": 0})
+    return path
@@ -0,0 +1,116 @@
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+
+# ==================================================
+# COLUMN SCHEMAS
+# ==================================================
+# Each dataset declares how its columns are stored once they are loaded:
+# answer scales become ordered categoricals, Likert ratings small integers,
+# Yes/No answers booleans. Every column is converted once at ingest (after
+# the column mapping and answer normalisation, see datasets.clean), so the
+# frames are a fraction of their text size and every chart and filter works
+# on integer codes. Columns a schema does not mention keep the automatic
+# rule: text with few distinct answers becomes an unordered categorical.
+#
+# Schemas map a column name, or a pattern from starts()/pattern(), to one of
+# the column types below. The first matching entry wins.
+
+YEARS = ["Year 1", "Year 2", "Year 3", "Year 4"]
+CGPA_BINS = ["0 - 1.99", "2.00 - 2.49", "2.50 - 2.99", "3.00 - 3.49", "3.50 - 4.00"]
+FREQUENCY = ["Never", "Rarely", "Sometimes", "Often", "Always"]
+YES_NO_UNSURE = ["No", "Not sure", "Yes"]
+
+
+@dataclass(frozen=True)
+class Category:
+    """Categorical column; ``order`` (if given) makes it an ordered scale.
+
+    Answers outside ``order`` are kept, sorted after the known ones.
+    """
+    order: tuple = None
+
+    def __post_init__(self):
+        if self.order is not None:
+            object.__setattr__(self, "order", tuple(self.order))
+
+    def apply(self, values):
+        if self.order is None:
+            return values.astype("category")
+        extra = sorted(set(values.dropna().unique()) - set(self.order))
+        return pd.Series(
+            pd.Categorical(values, categories=list(self.order) + extra, ordered=True),
+            index=values.index,
+        )
+
+
+@dataclass(frozen=True)
+class YesNo:
+    """"Yes"/"No" answers as booleans (nullable only when some are blank)."""
+
+    def apply(self, values):
+        flags = values.map({"Yes": True, "No": False})
+        return flags.astype("boolean" if flags.isna().any() else bool)
+
+
+@dataclass(frozen=True)
+class Integer:
+    """Whole numbers in the smallest fitting nullable integer type."""
+    dtype: str = "Int16"
+
+    def apply(self, values):
+        return pd.to_numeric(values, errors="coerce").round().astype(self.dtype)
+
+
+@dataclass(frozen=True)
+class Likert(Integer):
+    """1-5 agreement ratings (stored as Int8)."""
+    dtype: str = "Int8"
+
+
+@dataclass(frozen=True)
+class Number:
+    """Fractional values such as GPAs (float32 is plenty for two decimals)."""
+    dtype: str = "float32"
+
+    def apply(self, values):
+        return pd.to_numeric(values, errors="coerce").astype(self.dtype)
+
+
+def starts(prefix):
+    """Schema key matching every column whose name starts with ``prefix``."""
+    return re.compile(re.escape(prefix) + ".*", re.DOTALL)
+
+
+def pattern(regex):
+    """Schema key matching column names against ``regex``."""
+    return re.compile(regex, re.DOTALL)
+
+
+def column_type(schema, column):
+    """The type ``schema`` declares for ``column`` (None when it is not listed)."""
+    found = schema.get(column)
+    if found is not None:
+        return found
+    for key, kind in schema.items():
+        if isinstance(key, re.Pattern) and key.fullmatch(column):
+            return kind
+    return None
+
+
+def apply_schema(schema, df):
+    """Convert every column of ``df`` that ``schema`` declares."""
+    for column in df.columns:
+        kind = column_type(schema, column)
+        if kind is not None:
+            df[column] = kind.apply(df[column])
+    return df
+
+
+def fingerprint(schema):
+    """Stable text form of ``schema`` (part of the cached-copy stamp)."""
+    return repr(sorted(
+        (key.pattern if isinstance(key, re.Pattern) else key, repr(kind))
+        for key, kind in schema.items()
+    ))
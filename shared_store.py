@@ -0,0 +1,312 @@
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_store import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, workers may build twice
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # without pyarrow every process keeps its own frames
+    pa = ipc = None
+
+# ==================================================
+# SHARED-MEMORY DATASET STORE
+# ==================================================
+# With several Streamlit server processes on one machine, each prepared
+# dataset is materialised once per CSV version as an uncompressed Arrow IPC
+# file in shared memory (/dev/shm) and every worker memory-maps it, so the
+# column buffers are the same physical pages in all of them. Text columns
+# (most of the bytes) become pandas string columns over those buffers
+# without a copy; only what pandas keeps in its own layout (categorical
+# codes, nullable-integer masks) is private to a worker.
+#
+# A small "<name>.current" handle names the file of the latest version and
+# is swapped with os.replace, so a refresh moves every worker to the new
+# version on its next load, while frames already attached to the old file
+# keep their mapping until they are dropped. One worker builds a version
+# (under a file lock); the others wait for it and attach.
+#
+# The row-sized arrays built on top of a frame (cube codes, answer bitmaps,
+# multi-select bits, the Likert ratings matrix) are shared the same way by
+# share(): each worker still builds them, but the first to finish writes
+# them to one file and every worker then drops its own copy and maps that
+# file instead.
+
+ENABLED = os.environ.get("SS2200_SHARED_STORE", "1") not in ("", "0")
+
+
+def _default_dir():
+    # One store per data folder, so checkouts and benchmark runs never mix
+    tag = hashlib.sha1(str(DATA_DIR.resolve()).encode()).hexdigest()[:12]
+    shm = Path("/dev/shm")
+    return shm / f"ss2200-{tag}" if shm.is_dir() else DATA_DIR / ".cache" / "shared"
+
+
+# Folder of the shared files (override with SS2200_SHARED_DIR)
+STORE_DIR = Path(os.environ.get("SS2200_SHARED_DIR") or _default_dir())
+
+
+_LAYOUT_KEY = b"ss2200_layout"
+
+
+def available():
+    return ENABLED and pa is not None
+
+
+def _encode(df):
+    # Each column is stored in the layout pandas keeps it in, so _decode()
+    # can wrap the mapped buffers without copying: categoricals as their
+    # codes, nullable columns as values plus a byte mask, NumPy columns as
+    # they are. Anything else (text) goes through Arrow's own conversion.
+    arrays, layout = {}, []
+    for i, column in enumerate(df.columns):
+        values, key = df[column].array, f"c{i}"
+        dtype = values.dtype
+        entry = {"name": column, "key": key, "kind": "arrow"}
+        if isinstance(dtype, pd.CategoricalDtype) and pd.api.types.is_string_dtype(dtype.categories):
+            arrays[key] = pa.array(np.asarray(values.codes))
+            entry.update(kind="category", categories=list(dtype.categories), ordered=bool(dtype.ordered))
+        elif isinstance(values, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+            arrays[key] = pa.array(values.to_numpy(dtype=dtype.numpy_dtype, na_value=0))
+            arrays[key + ".mask"] = pa.array(np.asarray(values.isna()).view(np.uint8))
+            entry.update(kind="masked", dtype=str(dtype))
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+            data = np.asarray(values)
+            arrays[key] = pa.array(data.view(np.uint8) if dtype.kind == "b" else data)
+            entry.update(kind="numpy", dtype=str(dtype))
+        else:
+            arrays[key] = pa.array(values)
+        layout.append(entry)
+    # Text columns may come in chunks; one chunk per column keeps them contiguous
+    table = pa.table(arrays).combine_chunks()
+    return table.replace_schema_metadata({_LAYOUT_KEY: json.dumps(layout).encode()})
+
+
+def _decode(table):
+    def buffer(key):
+        column = table.column(key)
+        array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        return array.to_numpy(zero_copy_only=False)  # a view for a single chunk
+
+    data = {}
+    for entry in json.loads(table.schema.metadata[_LAYOUT_KEY]):
+        key, kind = entry["key"], entry["kind"]
+        if kind == "category":
+            dtype = pd.CategoricalDtype(entry["categories"], ordered=entry["ordered"])
+            values = pd.Categorical.from_codes(buffer(key), dtype=dtype, validate=False)
+        elif kind == "masked":
+            array_type = pd.api.types.pandas_dtype(entry["dtype"]).construct_array_type()
+            values = array_type(buffer(key), buffer(key + ".mask").view(bool), copy=False)
+        elif kind == "numpy":
+            values = buffer(key).view(entry["dtype"])
+        else:
+            values = table.column(key).to_pandas()
+        data[entry["name"]] = pd.Series(values, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+
+def _handle_path(name):
+    return STORE_DIR / f"{name}.current"
+
+
+def _stamp(version, schema_id):
+    return {"path": version[0], "mtime_ns": version[1], "size": version[2], "schema": schema_id}
+
+
+def handle(name):
+    """The current handle of ``name``: its file and the version it holds, or None."""
+    try:
+        return json.loads(_handle_path(name).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def attach(name, version, schema_id=""):
+    """Frame of ``name`` at ``version`` mapped from shared memory, or None."""
+    if not available():
+        return None
+    current = handle(name)
+    if current is None or current.get("stamp") != _stamp(version, schema_id):
+        return None
+    try:
+        source = pa.memory_map(str(STORE_DIR / current["file"]))
+        table = ipc.open_file(source).read_all()
+    except (OSError, KeyError, pa.ArrowInvalid):
+        return None
+    return _decode(table)
+
+
+def publish(name, version, df, schema_id=""):
+    """Write ``df`` as the shared copy of ``name`` at ``version`` and make it current.
+
+    Returns the frame attached from shared memory, or ``df`` itself when the
+    store is unavailable or full.
+    """
+    if not available():
+        return df
+    stamp = _stamp(version, schema_id)
+    digest = hashlib.sha1(json.dumps(stamp, sort_keys=True).encode()).hexdigest()[:16]
+    filename = f"{name}-{digest}.arrow"
+    tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    path = STORE_DIR / filename
+    tmp = None
+    try:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        table = _encode(df)
+        tmp = path.with_suffix(tmp_suffix)
+        with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            # One record batch, so every column maps as a single buffer
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(tmp, path)
+        tmp = _handle_path(name).with_suffix(tmp_suffix)
+        tmp.write_text(json.dumps({"file": filename, "stamp": stamp}))
+        os.replace(tmp, _handle_path(name))
+    except OSError:
+        # Out of shared memory (or a read-only folder): keep the private frame
+        if tmp is not None:
+            with contextlib.suppress(OSError):
+                tmp.unlink()
+        return df
+    _drop_old(name, filename)
+    shared = attach(name, version, schema_id)
+    return df if shared is None else shared
+
+
+def _drop_old(name, current):
+    # Workers still mapping an old file keep it alive until they let go
+    for old in STORE_DIR.glob(f"{name}-*.arrow"):
+        if old.name != current:
+            with contextlib.suppress(OSError):
+                old.unlink()
+
+
+@contextlib.contextmanager
+def building(name):
+    """Hold the cross-process lock for materialising ``name``."""
+    if not available() or fcntl is None:
+        yield
+        return
+    try:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        lock = open(STORE_DIR / f"{name}.lock", "a")
+    except OSError:
+        yield
+        return
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# ==================================================
+# SHARED ARRAYS
+# ==================================================
+
+_ALIGN = 64
+
+
+def _arrays_path(name, kind, stamp):
+    tag = hashlib.sha1(kind.encode()).hexdigest()[:8]
+    digest = hashlib.sha1(json.dumps([kind, stamp], sort_keys=True).encode()).hexdigest()[:16]
+    return STORE_DIR / f"{name}.{tag}-{digest}.bin"
+
+
+def _layout(arrays):
+    return [[array.dtype.str, list(array.shape)] for array in arrays]
+
+
+def _map_arrays(path):
+    # File: 8-byte header length, JSON header, then each array at its offset
+    with open(path, "rb") as handle:
+        buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    size = int.from_bytes(buffer[:8], "little")
+    header = json.loads(buffer[8:8 + size])
+    views = [
+        np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+        for (dtype, shape), offset in zip(header["layout"], header["offsets"])
+    ]
+    return header, views
+
+
+def _write_arrays(path, stamp, arrays, replace):
+    offsets = []
+    layout = _layout(arrays)
+    # The header length depends on the offsets, so leave room for their digits
+    size = len(json.dumps({"stamp": stamp, "layout": layout, "offsets": [2**40] * len(arrays)}))
+    offset = -(-(8 + size) // _ALIGN) * _ALIGN
+    for array in arrays:
+        offsets.append(offset)
+        offset = -(-(offset + array.nbytes) // _ALIGN) * _ALIGN
+    header = json.dumps({"stamp": stamp, "layout": layout, "offsets": offsets}).encode()
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as handle:
+            handle.write(len(header).to_bytes(8, "little") + header)
+            for array, start in zip(arrays, offsets):
+                handle.seek(start)
+                np.ascontiguousarray(array).tofile(handle)
+        if replace:
+            os.replace(tmp, path)
+        else:
+            # Workers building at the same time all map the first file written
+            with contextlib.suppress(FileExistsError):
+                os.link(tmp, path)
+    finally:
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+
+
+def share(name, version, kind, arrays, schema_id=""):
+    """``arrays`` (NumPy arrays built from ``name`` at ``version``) as
+    read-only views of one shared file per ``kind``.
+
+    The first worker writes the file; the others map it when it holds arrays
+    of the same dtypes and shapes. Returns ``arrays`` unchanged when the
+    store is switched off or the file cannot be written.
+    """
+    arrays = list(arrays)
+    if not ENABLED or not arrays:
+        return arrays
+    stamp = _stamp(version, schema_id)
+    path = _arrays_path(name, kind, stamp)
+    layout = _layout(arrays)
+    stale = False
+    try:
+        header, views = _map_arrays(path)
+        if header["stamp"] == stamp and header["layout"] == layout:
+            return views
+        stale = True  # written by other code: replace it
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError):
+        stale = True
+    try:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        _write_arrays(path, stamp, arrays, replace=stale)
+        header, views = _map_arrays(path)
+    except (OSError, ValueError, KeyError):
+        # Out of shared memory (or a read-only folder): keep the private arrays
+        return arrays
+    if header["stamp"] != stamp or header["layout"] != layout:
+        return arrays
+    prefix = path.name.rsplit("-", 1)[0]
+    for old in STORE_DIR.glob(f"{prefix}-*.bin"):
+        if old != path:
+            with contextlib.suppress(OSError):
+                old.unlink()
+    return views
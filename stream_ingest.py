@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregations import CountTables, answer_order, answers, count_table, encode
+from datasets import DATASETS, clean, source_path
+from perf import phase
+
+# ==================================================
+# STREAMING INGEST
+# ==================================================
+# For survey exports too big to hold in memory, the CSV is read in chunks of
+# CHUNK_ROWS rows (only the columns that are needed), each chunk is cleaned
+# like a full load (column mapping, "year 1" -> "Year 1", trimmed answers,
+# derived columns) and folded into running count and sum tables. Memory then
+# depends on the chunk size and the number of answer combinations, never on
+# the size of the file.
+
+# Rows read per chunk (override with SS2200_CHUNK_ROWS)
+CHUNK_ROWS = int(os.environ.get("SS2200_CHUNK_ROWS", 100_000))
+
+# Aggregate-only pages stream CSVs larger than this (SS2200_STREAM_ABOVE_MB)
+STREAM_ABOVE_BYTES = int(float(os.environ.get("SS2200_STREAM_ABOVE_MB", 256)) * 2**20)
+
+
+def should_stream(name):
+    """True when dataset ``name``'s CSV is big enough to aggregate in chunks."""
+    try:
+        return source_path(name).stat().st_size > STREAM_ABOVE_BYTES
+    except OSError:
+        return False
+
+
+def read_chunks(name, columns=None, chunk_rows=None):
+    """Yield cleaned chunks of dataset ``name``, limited to ``columns`` if given."""
+    dataset = DATASETS[name]
+    path = source_path(name)
+    usecols = None
+    if columns is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        raw_names = {dataset.rename.get(raw, raw): raw for raw in header}
+        # Derived columns need the whole row, so only narrow plain columns
+        if all(c in raw_names for c in columns):
+            usecols = [raw_names[c] for c in columns]
+
+    reader = pd.read_csv(path, usecols=usecols, chunksize=chunk_rows or CHUNK_ROWS)
+    with reader:
+        for chunk in reader:
+            yield clean(dataset, chunk)
+
+
+class RunningCounts:
+    """Joint answer counts (and per-combination sums) folded in chunk by chunk.
+
+    ``axes`` maps each column to its fixed category order, or to None to
+    collect the answers as they appear (reported in answer order, like encode()).
+    ``sums`` names numeric columns to total per answer combination.
+    """
+
+    def __init__(self, axes, sums=()):
+        self.columns = list(axes)
+        self._fixed = [categories is not None for categories in axes.values()]
+        self._labels = [
+            {label: i for i, label in enumerate(categories or [])}
+            for categories in axes.values()
+        ]
+        self._scales = [None] * len(self.columns)
+        shape = tuple(len(labels) for labels in self._labels)
+        self.table = np.zeros(shape, dtype=np.int64)
+        self.sum_columns = list(sums)
+        self._sums = {column: np.zeros(shape) for column in self.sum_columns}
+        self._valid = {column: np.zeros(shape, dtype=np.int64) for column in self.sum_columns}
+        self.n_rows = 0
+
+    def _codes(self, axis, values):
+        labels = self._labels[axis]
+        if self._fixed[axis]:
+            return encode(values, list(labels))[0]
+        values = answers(values)
+        self._scales[axis] = values.iloc[:0]  # dtype only, for answer_order()
+        local_codes, uniques = pd.factorize(values)
+        for label in uniques:
+            labels.setdefault(label, len(labels))
+        mapping = np.array([labels[label] for label in uniques] + [-1], dtype=np.int64)
+        return mapping[local_codes]  # -1 (missing) picks the trailing -1
+
+    def _grow(self, array):
+        shape = tuple(len(labels) for labels in self._labels)
+        if array.shape == shape:
+            return array
+        return np.pad(array, [(0, new - old) for old, new in zip(array.shape, shape)])
+
+    def add(self, chunk):
+        """Fold the rows of ``chunk`` into the running tables."""
+        with phase("aggregate"):
+            codes = [self._codes(axis, chunk[column]) for axis, column in enumerate(self.columns)]
+            self.table = self._grow(self.table)
+            shape = self.table.shape
+            self.table += count_table(codes, shape)
+            self.n_rows += len(chunk)
+
+            if self.sum_columns:
+                valid = np.ones(len(chunk), dtype=bool)
+                for column_codes in codes:
+                    valid &= column_codes >= 0
+                flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+                size = int(np.prod(shape))
+                for column in self.sum_columns:
+                    values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=float)[valid]
+                    present = ~np.isnan(values)
+                    self._sums[column] = self._grow(self._sums[column])
+                    self._valid[column] = self._grow(self._valid[column])
+                    self._sums[column] += np.bincount(
+                        flat[present], weights=values[present], minlength=size
+                    ).reshape(shape)
+                    self._valid[column] += np.bincount(flat[present], minlength=size).reshape(shape)
+        return self
+
+    def _order(self):
+        # Collected answers are reported in answer order; fixed ones keep theirs
+        orders, labels = [], []
+        for fixed, found, scale in zip(self._fixed, self._labels, self._scales):
+            names = list(found)
+            if fixed:
+                order = list(range(len(names)))
+            else:
+                position = {name: i for i, name in enumerate(names)}
+                order = [position[name] for name in answer_order(scale, names)]
+            orders.append(order)
+            labels.append([names[i] for i in order])
+        return orders, labels
+
+    def _sorted(self, array):
+        orders, _ = self._order()
+        array = self._grow(array)
+        for axis, order in enumerate(orders):
+            array = np.take(array, order, axis=axis)
+        return array
+
+    def result(self):
+        """The counts so far as CountTables (same as build_count_tables)."""
+        _, labels = self._order()
+        return CountTables(self._sorted(self.table), self.columns, labels)
+
+    def sums(self, column):
+        """(sum, number of non-missing values) of ``column`` per answer combination."""
+        return self._sorted(self._sums[column]), self._sorted(self._valid[column])
+
+
+def stream_counts(name, axes, sums=(), chunk_rows=None):
+    """Fold dataset ``name`` into RunningCounts one chunk at a time."""
+    running = RunningCounts(axes, sums)
+    with phase("parse"):
+        for chunk in read_chunks(name, list(axes) + list(sums), chunk_rows):
+            running.add(chunk)
+    return running
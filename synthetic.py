@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_store import data_path
+from datasets import DATASETS
+
+# ==================================================
+# SYNTHETIC SURVEY DATA
+# ==================================================
+# Scaled-up copies of the bundled survey CSVs for benchmarking. Rows are
+# drawn with replacement from the real responses, so every column keeps its
+# exact header, answer spelling and mix (and the answers stay correlated the
+# way real respondents answered). Files are written in chunks, so 10M rows
+# never have to fit in memory at once.
+
+SIZES = (100, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Rows generated and written per chunk
+CHUNK_ROWS = 250_000
+
+
+def _source_rows(name):
+    # Read as plain text so answers are written back exactly as they were
+    return pd.read_csv(
+        data_path(DATASETS[name].file), dtype=str, keep_default_na=False
+    )
+
+
+def synthetic_frame(name, n_rows, seed=0):
+    """``n_rows`` responses with the same columns as dataset ``name``'s CSV."""
+    source = _source_rows(name)
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(source), size=n_rows)
+    return source.iloc[rows].reset_index(drop=True)
+
+
+def write_synthetic(name, n_rows, directory, seed=0):
+    """Write a synthetic copy of dataset ``name`` into ``directory``.
+
+    The file gets the dataset's usual file name, so pointing SS2200_DATA_DIR
+    at ``directory`` makes the app read it instead of the bundled one. An
+    existing file with the right number of rows is kept.
+    """
+    directory = Path(directory)
+    path = directory / DATASETS[name].file
+    marker = path.with_name(path.name + ".rows")
+    if path.exists() and marker.exists() and marker.read_text() == f"{n_rows} {seed}":
+        return path
+
+    directory.mkdir(parents=True, exist_ok=True)
+    source = _source_rows(name)
+    rng = np.random.default_rng(seed)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as out:
+        source.iloc[:0].to_csv(out, index=False)
+        for start in range(0, n_rows, CHUNK_ROWS):
+            rows = rng.integers(0, len(source), size=min(CHUNK_ROWS, n_rows - start))
+            source.iloc[rows].to_csv(out, index=False, header=False)
+    os.replace(tmp, path)
+    marker.write_text(f"{n_rows} {seed}")
+    return path
+
+
+def write_all(n_rows, directory, seed=0):
+    """Synthetic copies of every registered dataset at ``n_rows`` rows."""
+    return {name: write_synthetic(name, n_rows, directory, seed) for name in DATASETS}
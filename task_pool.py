@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+
+# ==================================================
+# PARALLEL PAGE TASKS
+# ==================================================
+# A page's charts are independent of each other: each one aggregates the
+# filtered rows and builds a figure. Declared as tasks (Page.task in
+# reactive.py), they are all started on one bounded, process-wide thread
+# pool as soon as the page knows its filters, and each section then takes
+# its own result in page order, waiting only for a task still running. So
+# charts further down are being built while the first ones are sent, and
+# the NumPy parts (bitmap popcounts, count tables, Likert summaries)
+# overlap on several cores; Plotly's pure-Python figure code still takes
+# turns on the GIL. A task must not call Streamlit: everything it reads
+# comes in as arguments.
+#
+# Every result taken is timed (queued, running, and how long the section
+# waited for it) and listed in the profiling overlay (?profile=1, perf.py).
+
+# Threads of the pool (override with SS2200_BUILD_THREADS; 0 or 1 runs each
+# task inline when its section asks for it)
+BUILD_THREADS = int(os.environ.get("SS2200_BUILD_THREADS", min(4, os.cpu_count() or 1)))
+
+_lock = threading.Lock()
+_pool = None
+
+
+def enabled():
+    return BUILD_THREADS > 1
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(BUILD_THREADS, thread_name_prefix="page-build")
+        return _pool
+
+
+class Task:
+    """One call of ``fn(*args)`` started on the pool, with its timings."""
+
+    def __init__(self, name, fn, args):
+        self.name = name
+        self.thread = None
+        self.phases = {}  # phase -> totals, while the page run is profiled
+        self._submitted = time.perf_counter()
+        self._started = self._finished = None
+        profiled = perf.is_profiling()
+        self._future = _executor().submit(self._run, fn, args, profiled)
+
+    def _run(self, fn, args, profiled):
+        self._started = time.perf_counter()
+        self.thread = threading.current_thread().name
+        try:
+            if not profiled:
+                return fn(*args)
+            with perf.collecting(self.phases):
+                return fn(*args)
+        finally:
+            self._finished = time.perf_counter()
+
+    def result(self):
+        """The task's return value (or exception), once it finished."""
+        start = time.perf_counter()
+        try:
+            return self._future.result()
+        finally:
+            perf.record_task({
+                "task": self.name,
+                "thread": self.thread,
+                "queued_ms": (self._started - self._submitted) * 1000,
+                "run_ms": (self._finished - self._started) * 1000,
+                "waited_ms": (time.perf_counter() - start) * 1000,
+                "phases": {name: round(p["ms"], 1) for name, p in self.phases.items()},
+            })
+
+
+def submit(name, fn, *args):
+    """Start ``fn(*args)`` on the pool; None when the pool is switched off."""
+    if not enabled():
+        return None
+    try:
+        return Task(name, fn, args)
+    except RuntimeError:  # the interpreter is shutting down: run it inline
+        return None
+
+
+def run_inline(name, fn, *args):
+    """``fn(*args)`` in this thread, timed like a pool task."""
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        perf.record_task({
+            "task": name, "thread": "inline", "queued_ms": 0.0, "run_ms": ms, "waited_ms": ms,
+        })
@@ -0,0 +1,104 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar_cache
+import csv_append
+import datasets
+import disk_cache
+import shared_store
+from bitmap_index import BitmapIndex
+from cube import SurveyCube
+
+NAME = "internet_use"
+BUNDLED = Path(__file__).resolve().parent.parent / datasets.DATASETS[NAME].file
+FILTER_COLUMNS = ("Gender", "Year_of_Study", "Race")
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    """A copy of the bundled Internet Use export, read through tmp_path only."""
+    path = tmp_path / BUNDLED.name
+    shutil.copyfile(BUNDLED, path)
+    monkeypatch.setattr(datasets, "source_path", lambda name: path)
+    monkeypatch.setattr(columnar_cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(shared_store, "ENABLED", False)
+    monkeypatch.setattr(disk_cache, "ENABLED", False)
+    datasets._load.cache_clear()
+    datasets._lineage.clear()
+    yield path
+    datasets._load.cache_clear()
+    datasets._lineage.clear()
+
+
+def grow(path, newline):
+    """Append rows the way a re-export does: after the old last row, no final newline."""
+    rows = pd.read_csv(BUNDLED).iloc[:25]
+    rows.iloc[0, rows.columns.get_loc("Race / Bangsa:")] = "Iban"  # an answer not seen before
+    text = rows.to_csv(header=False, index=False, lineterminator=newline).rstrip(newline)
+    with open(path, "ab") as handle:
+        handle.write((newline + text).encode())
+
+
+def full_rebuild(path):
+    return datasets.prepare(datasets.DATASETS[NAME], pd.read_csv(path))
+
+
+def test_bundled_export_has_no_final_newline():
+    assert not BUNDLED.read_bytes().endswith(b"\n")
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_appended_rows_match_a_full_rebuild(export, newline):
+    before = datasets.dataset_version(NAME)
+    df = datasets._load(NAME)
+    fingerprint = csv_append.fingerprint(export, before[2])
+    assert fingerprint is not None
+
+    grow(export, newline)
+    after = datasets.dataset_version(NAME)
+    assert csv_append.is_append(export, before[2], fingerprint)
+
+    refreshed = datasets._refresh_load(df, before, NAME)
+    assert refreshed is not None, "the grown export was not recognised as an append"
+    expected = full_rebuild(export)
+    assert after == datasets.dataset_version(NAME)
+    pd.testing.assert_frame_equal(refreshed, expected, check_categorical=False)
+
+    tail = csv_append.read_tail(export, before[2])
+    assert len(tail) == 25
+    appended = datasets.append_rows(df, datasets.clean(datasets.DATASETS[NAME], tail))
+    pd.testing.assert_frame_equal(appended, expected, check_categorical=False)
+
+    old_cube, new_cube = SurveyCube(df), SurveyCube(expected)
+    grown_cube = old_cube.appended(appended.iloc[len(df):])
+    index = BitmapIndex.from_cube(old_cube, FILTER_COLUMNS).appended(
+        {c: grown_cube.codes[c][len(df):] for c in FILTER_COLUMNS},
+        {c: grown_cube.labels[c] for c in FILTER_COLUMNS},
+        len(appended) - len(df),
+    )
+    rebuilt = BitmapIndex.from_cube(new_cube, FILTER_COLUMNS)
+    assert index.labels == rebuilt.labels
+    assert np.array_equal(index.select(), rebuilt.select())
+    for column in FILTER_COLUMNS:
+        for bits, rebuilt_bits in zip(index.bitmaps[column], rebuilt.bitmaps[column]):
+            assert np.array_equal(bits, rebuilt_bits)
+
+
+def test_a_longer_last_row_is_not_an_append(export):
+    size = export.stat().st_size
+    fingerprint = csv_append.fingerprint(export, size)
+    with open(export, "ab") as handle:
+        handle.write(b" (edited)\n")
+    assert not csv_append.is_append(export, size, fingerprint)
+
+
+def test_an_edit_before_the_old_end_is_not_an_append(export):
+    size = export.stat().st_size
+    fingerprint = csv_append.fingerprint(export, size)
+    data = export.read_bytes()
+    export.write_bytes(data.replace(b"Female", b"female", 1) + b"\n")
+    assert not csv_append.is_append(export, size, fingerprint)
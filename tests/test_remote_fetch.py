@@ -0,0 +1,118 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import remote_fetch
+
+LAST_MODIFIED = "Sun, 18 Oct 2026 07:00:00 GMT"
+
+
+class StandIn:
+    """Local HTTP server playing the remote host of one CSV."""
+
+    def __init__(self):
+        self.body = b"a,b\n1,2\n"
+        self.etag = '"v1"'
+        self.requests = []  # headers of every request received
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append(dict(self.headers))
+                if self.headers.get("If-None-Match") == stand_in.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", stand_in.etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Content-Length", str(len(stand_in.body)))
+                self.end_headers()
+                self.wfile.write(stand_in.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/survey.csv"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread.is_alive():
+            self.server.shutdown()
+            self.server.server_close()
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    monkeypatch.setattr(remote_fetch, "MIRROR_DIR", tmp_path / "mirror")
+    stand_in = StandIn()
+    yield stand_in
+    stand_in.stop()
+
+
+def _meta(path):
+    return json.loads(path.with_name(path.name + ".json").read_text())
+
+
+def test_first_fetch_downloads_and_keeps_validators(remote):
+    path = remote_fetch.fetch(remote.url, offline=False)
+
+    assert path.read_bytes() == remote.body
+    assert _meta(path)["etag"] == '"v1"'
+    assert _meta(path)["last_modified"] == LAST_MODIFIED
+    assert "If-None-Match" not in remote.requests[0]
+
+
+def test_fresh_copy_is_served_without_asking(remote):
+    remote_fetch.fetch(remote.url, offline=False)
+    remote_fetch.fetch(remote.url, max_age=3600, offline=False)
+
+    assert len(remote.requests) == 1
+
+
+def test_stale_copy_is_revalidated_with_304(remote):
+    path = remote_fetch.fetch(remote.url, offline=False)
+    path_again = remote_fetch.fetch(remote.url, max_age=0, offline=False)
+
+    assert path_again == path
+    assert path.read_bytes() == remote.body
+    assert remote.requests[1]["If-None-Match"] == '"v1"'
+    assert remote.requests[1]["If-Modified-Since"] == LAST_MODIFIED
+    assert "error" not in _meta(path)
+
+
+def test_changed_file_is_downloaded_again(remote):
+    remote_fetch.fetch(remote.url, offline=False)
+    remote.body, remote.etag = b"a,b\n1,2\n3,4\n", '"v2"'
+    path = remote_fetch.fetch(remote.url, max_age=0, offline=False)
+
+    assert path.read_bytes() == b"a,b\n1,2\n3,4\n"
+    assert _meta(path)["etag"] == '"v2"'
+
+
+def test_network_failure_falls_back_to_the_mirror(remote):
+    path = remote_fetch.fetch(remote.url, offline=False)
+    remote.stop()
+
+    assert remote_fetch.fetch(remote.url, max_age=0, offline=False, timeout=2) == path
+    assert path.read_bytes() == b"a,b\n1,2\n"
+    assert "error" in _meta(path)
+
+
+def test_offline_mode_serves_the_mirror_or_raises(remote):
+    with pytest.raises(remote_fetch.FetchError):
+        remote_fetch.fetch(remote.url, offline=True)
+    path = remote_fetch.fetch(remote.url, offline=False)
+
+    assert remote_fetch.fetch(remote.url, max_age=0, offline=True) == path
+    assert len(remote.requests) == 1
+
+
+def test_unreachable_url_without_mirror_raises(remote):
+    remote.stop()
+    with pytest.raises(remote_fetch.FetchError):
+        remote_fetch.fetch(remote.url, offline=False, timeout=2)
@@ -0,0 +1,149 @@
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cube import survey_cube
+from datasets import load_dataset, per_version, rows_since
+from perf import phase
+
+# ==================================================
+# SEMESTER GPA TRAJECTORIES
+# ==================================================
+# The "<n>th Year Semester <m>" GPA columns are parsed once into a float32
+# (student x semester) array, NaN where a semester has no GPA. Percentiles,
+# semester-to-semester changes and gaps are then column operations on that
+# array, and per-cohort results select rows by the cohort's codes in the
+# survey cube. A student is irregular when a semester is missing between
+# their first and last recorded GPA.
+
+SEMESTER = re.compile(r"(\d)(?:st|nd|rd|th) Year Semester (\d)")
+PERCENTILES = (10, 25, 50, 75, 90)
+COHORT = "Bachelor  Academic Year in EU"
+
+
+def semester_columns(columns):
+    """The semester GPA columns of ``columns``, in study order."""
+    def order(column):
+        match = SEMESTER.fullmatch(column)
+        return int(match.group(1)), int(match.group(2))
+
+    return sorted((c for c in columns if SEMESTER.fullmatch(c)), key=order)
+
+
+def _gpas(df, semesters):
+    gpa = np.full((len(df), len(semesters)), np.nan, dtype=np.float32)
+    for j, column in enumerate(semesters):
+        gpa[:, j] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+    return gpa
+
+
+class Trajectories:
+    """float32 GPA array (student x semester) with gap and change helpers."""
+
+    def __init__(self, semesters, gpa):
+        self.semesters = list(semesters)
+        self.gpa = gpa
+        self.n_rows = len(gpa)
+
+    @classmethod
+    def from_frame(cls, df):
+        semesters = semester_columns(df.columns)
+        return cls(semesters, _gpas(df, semesters))
+
+    def appended(self, rows):
+        """New trajectories with the students in frame ``rows`` added."""
+        return Trajectories(self.semesters, np.concatenate([self.gpa, _gpas(rows, self.semesters)]))
+
+    def gaps(self):
+        """Missing semesters between each student's first and last GPA."""
+        observed = ~np.isnan(self.gpa)
+        taken = observed.sum(axis=1)
+        first = observed.argmax(axis=1)
+        last = observed.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)
+        return np.where(taken > 0, last - first + 1 - taken, 0)
+
+    def deltas(self):
+        """GPA change from each semester to the next (NaN when either is missing)."""
+        return np.diff(self.gpa, axis=1)
+
+    def percentiles(self, rows=None, q=PERCENTILES):
+        """(percentile x semester) GPA percentiles over ``rows`` (all students by default)."""
+        gpa = self.gpa if rows is None else self.gpa[rows]
+        result = np.full((len(q), len(self.semesters)), np.nan)
+        for j in range(len(self.semesters)):
+            column = gpa[:, j]
+            column = column[~np.isnan(column)]
+            if len(column):
+                result[:, j] = np.percentile(column, q)
+        return result
+
+
+class CohortTrajectories:
+    """Per-cohort GPA percentiles, mean changes and irregular-student counts.
+
+    Cohort 0 is "All" (every student, whatever their cohort).
+    """
+
+    def __init__(self, semesters, cohorts, percentiles, mean_deltas, students, irregular):
+        # students: with at least one GPA; irregular: with a gap between GPAs
+        self.semesters = semesters
+        self.cohorts = cohorts
+        self.percentiles = percentiles  # (cohort, PERCENTILES, semester)
+        self.mean_deltas = mean_deltas  # (cohort, semester - 1)
+        self.students = students
+        self.irregular = irregular
+
+    def table(self):
+        """Students, irregular students and mean change per cohort."""
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # cohorts without GPAs
+            return pd.DataFrame({
+                "Students": self.students,
+                "Irregular": self.irregular,
+                "Irregular %": (100 * self.irregular / self.students).round(1),
+                "Mean change per semester": np.nanmean(self.mean_deltas, axis=1).round(3),
+            }, index=pd.Index(self.cohorts, name="Cohort"))
+
+
+def _refresh_trajectories(trajectories, since, name):
+    rows = rows_since(name, since)
+    if rows is None:
+        return None
+    with phase("index"):
+        return trajectories.appended(rows)
+
+
+@per_version(refresh=_refresh_trajectories)
+def gpa_trajectories(name):
+    """Trajectories of dataset ``name``, rebuilt when its CSV changes."""
+    df = load_dataset(name)
+    with phase("index"):
+        return Trajectories.from_frame(df)
+
+
+@per_version(persist=True)
+def cohort_trajectories(name, cohort=COHORT):
+    """CohortTrajectories of dataset ``name`` by the answers to ``cohort``."""
+    trajectories = gpa_trajectories(name)
+    cube = survey_cube(name)
+    codes, labels = cube.codes[cohort], cube.labels[cohort]
+    with phase("aggregate"):
+        groups = [None] + [np.flatnonzero(codes == i) for i in range(len(labels))]
+        recorded = ~np.isnan(trajectories.gpa).all(axis=1)
+        gaps = trajectories.gaps()
+        deltas = trajectories.deltas()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN semesters
+            mean_deltas = np.stack([
+                np.nanmean(deltas if rows is None else deltas[rows], axis=0) for rows in groups
+            ])
+        return CohortTrajectories(
+            trajectories.semesters,
+            ["All"] + list(labels),
+            np.stack([trajectories.percentiles(rows) for rows in groups]),
+            mean_deltas,
+            np.array([int(recorded.sum())] + [int(recorded[rows].sum()) for rows in groups[1:]]),
+            np.array([int((gaps > 0).sum())] + [int((gaps[rows] > 0).sum()) for rows in groups[1:]]),
+        )
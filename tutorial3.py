@@ -10,32 +10,68 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+import charts
+from datasets import dataset_version, load_dataset
+from figure_cache import cached_figure
+from perf import plotly_chart
+from plo import outcome_scores
+from trajectory import PERCENTILES, cohort_trajectories
+
 st.set_page_config(page_title="GitHub Data Loader", layout="wide")
 st.title("Student Survey")
 
-url = 'https://raw.githubusercontent.com/s22a0050-ainun/SS2200/refs/heads/main/arts_faculty_data.csv'
-
-col1, col2, col3, col4 = st.columns(4)
-   
-col1.metric(label="PLO 2", value=f"3.3", help="PLO 2: Cognitive Skill", border=True)
-col2.metric(label="PLO 3", value=f"3.5", help="PLO 3: Digital Skill", border=True)
-col3.metric(label="PLO 4", value=f"4.0", help="PLO 4: Interpersonal Skill", border=True)
-col4.metric(label="PLO 5", value=f"4.3", help="PLO 5: Communication Skill", border=True)
-
-# Data Loading Function with Caching 
-@st.cache_data
-def load_data(data_url):
+# PLO scores from the evaluation ratings (column mapping in plo.ARTS_PLOS)
+plo_scores = outcome_scores("arts_faculty")
+
+plo_columns = st.columns(len(plo_scores.outcomes))
+for column, outcome, score in zip(plo_columns, plo_scores.outcomes, plo_scores.overall()):
+    column.metric(label=outcome.code, value=f"{score:.1f}", help=f"{outcome.code}: {outcome.name}", border=True)
+
+plo_by = st.radio("PLO scores by", ["Arts Program", "Gender"], horizontal=True)
+plo_table = plo_scores.by(plo_by)
+plo_codes = [outcome.code for outcome in plo_scores.outcomes]
+
+fig = cached_figure(dataset_version("arts_faculty"), f"plo_by:{plo_by}", None, lambda: charts.matrix(
+    plo_table[plo_codes].to_numpy(),
+    x=[f"{outcome.code}: {outcome.name}" for outcome in plo_scores.outcomes],
+    y=list(plo_table.index),
+    zmin=1,
+    zmax=5,
+    labels={"y": plo_by, "color": "Mean Rating"},
+    title=f"PLO Scores by {plo_by}",
+))
+plotly_chart(fig, use_container_width=True)
+st.dataframe(plo_table.round(2), use_container_width=True)
+
+# Semester GPA trajectories (percentile bands per cohort, see trajectory.py)
+st.subheader("📈 Semester GPA Trajectory")
+gpa_cohorts = cohort_trajectories("arts_faculty")
+cohort = st.selectbox("Cohort", gpa_cohorts.cohorts)
+k = gpa_cohorts.cohorts.index(cohort)
+
+fig = cached_figure(dataset_version("arts_faculty"), f"gpa_fan:{cohort}", None, lambda: charts.fan(
+    [column.replace(" Year Semester ", " Yr S") for column in gpa_cohorts.semesters],
+    gpa_cohorts.percentiles[k],
+    levels=PERCENTILES,
+    labels={"x": "Semester", "y": "GPA"},
+    title=f"GPA by Semester ({cohort})",
+))
+plotly_chart(fig, use_container_width=True)
+st.dataframe(gpa_cohorts.table(), use_container_width=True)
+
+# Data Loading (prepared once and kept in the columnar cache, see datasets.py)
+def load_data(name):
     try:
-        data_frame = pd.read_csv(data_url)
+        data_frame = load_dataset(name)
         # st.success replaces print() for a styled success message
-        st.success("DataFrame loaded successfully from URL! 🎉")
+        st.success("DataFrame loaded successfully! 🎉")
         return data_frame
     except Exception as e:
         # st.error replaces print() for error handling
         st.error(f"An error occurred while loading data: {e}")
         return pd.DataFrame() # Return an empty DataFrame on failure
 
-arts_df_url = load_data(url)
+arts_df_url = load_data("arts_faculty")
 
 # Streamlit Display
 if not arts_df_url.empty:
@@ -78,7 +114,7 @@ fig.update_layout(
 # Streamlit Display 
 
 # Display the interactive Plotly figure in the Streamlit app
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 data = {'Gender': ['Male', 'Female', 'Male', 'Female'],
@@ -112,7 +148,7 @@ fig = px.bar(avg_gpa_long,
 fig.update_layout(xaxis_tickangle=0)
 
 # Display the chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 data = {'Did you ever attend a Coaching center?': ['Yes', 'No', 'Yes', 'No', 'Yes', 'No', 'No', 'Yes', 'No']}
@@ -134,7 +170,7 @@ fig = px.pie(coaching_counts,
 fig.update_traces(textposition='inside', textinfo='percent+label')
 
 # Display the chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 # Create DataFrame based on the graph values 
@@ -157,7 +193,7 @@ fig = px.bar(df_arts,
 fig.update_layout(xaxis_tickangle=45)
 
 # Display the chart in Streamlit 
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 data = {'H.S.C or Equivalent study medium': ['Bangla', 'English', 'Madrasa', 'Bangla', 'Bangla', 'Bangla', 'Bangla']}
@@ -180,7 +216,7 @@ fig = px.pie(study_medium_counts,
 fig.update_traces(textposition='inside', textinfo='percent+label')
 
 # Display the chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 
 
@@ -221,4 +257,4 @@ fig = px.bar(program_gender_counts,
 fig.update_layout(xaxis_tickangle=45)
 
 # Display the chart in Streamlit
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,115 @@
+import logging
+import os
+import threading
+import time
+
+# ==================================================
+# BACKGROUND DATASET WATCHER
+# ==================================================
+# A daemon thread polls the registered survey CSVs. When one changes and has
+# stopped changing (the same version on two polls in a row, so an export
+# still being written is left alone), the thread loads the new version and
+# rebuilds every per_version result the pages have asked for (cube, indexes,
+# counts...) while pinned to that version. Only then is the version pointer
+# swapped (datasets.publish_version), so reruns keep reading the previous
+# version at full speed and never wait for, or see part of, a rebuild. A
+# build that fails or races a further change is not published.
+#
+# Keep the top of this module free of pandas imports: app.py imports it on
+# every cold start and the data modules are only loaded by the thread.
+
+# Seconds between polls (override with SS2200_WATCH_SECONDS)
+POLL_SECONDS = float(os.environ.get("SS2200_WATCH_SECONDS", 2))
+
+# Switch the watcher off with SS2200_WATCH=0 (every rerun then checks the files)
+ENABLED = os.environ.get("SS2200_WATCH", "1") not in ("", "0")
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """Polls datasets ``names`` and publishes each settled new version once built."""
+
+    def __init__(self, names=None, poll=POLL_SECONDS):
+        self.names = names
+        self.poll = poll
+        self.swaps = 0
+        self.errors = {}  # name -> last build error
+        self._seen = {}  # name -> version seen on the previous poll
+        self._failed = {}  # name -> version whose build failed (not retried)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ss2200-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        import datasets
+
+        if self.names is None:
+            self.names = list(datasets.DATASETS)
+        while True:
+            for name in self.names:
+                self.check(name)
+            if self._stop.wait(self.poll):
+                return
+
+    def check(self, name):
+        """Build and publish ``name`` when its CSV changed and has settled.
+
+        Returns True when a new version was published.
+        """
+        import datasets
+        from data_store import dataset_version as file_version
+
+        try:
+            version = file_version(datasets.source_path(name))
+        except OSError as error:
+            self.errors[name] = error
+            return False
+        previous, self._seen[name] = self._seen.get(name), version
+        published = datasets.published_version(name)
+        if version == published or version == self._failed.get(name):
+            return False
+        if published is not None and version != previous:
+            return False  # changed since the last poll: may still be being written
+
+        start = time.perf_counter()
+        try:
+            with datasets.building_version(name, version):
+                datasets.rebuild(name)
+            changed = file_version(datasets.source_path(name)) != version
+        except Exception as error:  # keep serving the published version
+            self.errors[name] = error
+            self._failed[name] = version
+            logger.exception("Rebuilding %s failed; still serving the previous version", name)
+            return False
+        if changed:
+            return False  # changed again while building: the next poll retries
+        datasets.publish_version(name, version)
+        self.errors.pop(name, None)
+        self._failed.pop(name, None)
+        self.swaps += 1
+        logger.info("Published %s in %.0f ms", name, (time.perf_counter() - start) * 1000)
+        return True
+
+
+_lock = threading.Lock()
+_watcher = None
+
+
+def start():
+    """Start the process-wide watcher (once); returns it, or None when disabled."""
+    global _watcher
+    if not ENABLED:
+        return None
+    with _lock:
+        if _watcher is None:
+            _watcher = Watcher().start()
+    return _watcher